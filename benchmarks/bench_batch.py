@@ -0,0 +1,49 @@
+"""
+Benchmarks checksumming, validating and querying many small documents, one after the other
+in the current process or spread over a pool of worker processes with jdic.batch.
+
+Run with: python benchmarks/bench_batch.py
+"""
+import multiprocessing
+from common import record, timed
+from jdic import jdic, batch, CompiledSchema
+
+DOCUMENTS = 20000 # About 15 nodes each
+SCHEMA = {
+    'type': 'object',
+    'properties': {'id': {'type': 'integer'}, 'status': {'type': 'string'}}
+}
+QUERY = {'score': {'$gt': 5}}
+OPS = ['checksum', ('validate', SCHEMA), ('find_match', QUERY)]
+
+
+def documents(count=DOCUMENTS):
+    """ Small documents: records holding a list of objects as well """
+    return [dict(record(i), items=[{'score': i % 11}, {'score': i % 13}]) for i in range(count)]
+
+
+def serial(docs):
+    """ Runs the operations on each document in turn, without the batch API """
+    schema = CompiledSchema(SCHEMA)
+    results = []
+    for doc in docs:
+        doc = jdic(doc)
+        results.append([doc.checksum(), doc.validate(schema),
+                        [[res.path, res.value.raw()] for res in doc.find_match(QUERY)]])
+    return results
+
+
+def main():
+    """ Runs the same operations serially and with growing numbers of workers """
+    docs = documents()
+    print('{} documents, {} CPUs'.format(DOCUMENTS, multiprocessing.cpu_count()))
+    print('    serially:                  {:10.1f} ms'.format(timed(lambda: serial(docs))))
+    for workers in [0, 1, 2, 4]:
+        print('    batch.map(), {} workers:    {:10.1f} ms'.format(
+            workers, timed(lambda: batch.map(docs, OPS, workers=workers))))
+    print('    batch.imap(), 4 workers:   {:10.1f} ms'.format(
+        timed(lambda: sum(1 for _ in batch.imap(iter(docs), OPS, workers=4)))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+"""
+Benchmarks browse() over a document of about a million nodes: the time taken to iterate
+on the results, with and without reading their paths, and the memory they use.
+
+Run with: python benchmarks/bench_browse.py
+"""
+import tracemalloc
+from common import document, timed
+from jdic import jdic
+
+RECORDS = 100000 # 10 nodes each
+
+
+def main():
+    """ Iterates on browse() results, then keeps them all to measure their memory """
+    doc = jdic(document(RECORDS))
+    nodes = sum(1 for _ in doc.browse())
+    print('nodes: {}'.format(nodes))
+    print('browse():              {:8.1f} ms'.format(timed(lambda: sum(1 for _ in doc.browse()))))
+    print('browse(), read paths:  {:8.1f} ms'.format(
+        timed(lambda: sum(1 for m in doc.browse() if m.path))))
+    tracemalloc.start()
+    results = list(doc.browse())
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print('results kept:          {:8.1f} MB ({:.0f} bytes per result)'.format(
+        size / 1024 / 1024, float(size) / len(results)))
+
+
+if __name__ == '__main__':
+    main()
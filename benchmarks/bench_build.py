@@ -0,0 +1,37 @@
+"""
+Benchmarks the instantiation of Jdic objects from Python data, with a custom serializer
+called on every value, in trusted mode where it is skipped, in lazy mode and adopted without
+any copy.
+
+Run with: python benchmarks/bench_build.py
+"""
+from common import document, timed
+from jdic import adopt, jdic
+
+RECORDS = 20000
+NUMBER = 3
+
+
+def serializer(obj):
+    """ A custom serializer leaving plain JSON values unchanged """
+    return obj
+
+
+def main():
+    """ Builds the same document in the different modes """
+    doc = document(RECORDS)
+    for record in doc['records']:
+        record['meta']['score'] = record['id'] / 7 # Floats, turned into ints when they can
+    builds = [
+        ('jdic(doc)', lambda: jdic(doc)),
+        ('jdic(doc, serializer=...)', lambda: jdic(doc, serializer=serializer)),
+        ('jdic(doc, trusted=True)', lambda: jdic(doc, serializer=serializer, trusted=True)),
+        ('jdic(doc, lazy=True)', lambda: jdic(doc, lazy=True)),
+        ('adopt(doc)', lambda: adopt(doc)),
+    ]
+    for name, build in builds:
+        print('{:<28} {:8.1f} ms'.format(name, timed(build, NUMBER)))
+
+
+if __name__ == '__main__':
+    main()
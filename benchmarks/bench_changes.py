@@ -0,0 +1,50 @@
+"""
+Benchmarks replicating the changes made to a large document: diffing it against a snapshot
+taken before the changes, or recording them with a ChangeLog, and patching a replica.
+
+Run with: python benchmarks/bench_changes.py
+"""
+from common import document, timed
+from jdic import jdic, ChangeLog
+
+RECORDS = 20000 # About 10 nodes each
+CHANGES = 100
+
+
+def mutate(doc, round_):
+    """ Modifies CHANGES records spread over the document """
+    for i in range(round_, RECORDS, RECORDS // CHANGES):
+        doc['records.{}.meta.score'.format(i)] = -round_
+        doc['records.{}.tags'.format(i)].append(round_)
+
+
+def with_diff(doc, replica, round_):
+    """ Replicates the changes by diffing the document against a snapshot """
+    snapshot = doc.new()
+    mutate(doc, round_)
+    replica.patch(snapshot.diff(doc), inplace=True)
+
+
+def with_log(doc, replica, round_):
+    """ Replicates the changes recorded by a ChangeLog """
+    log = doc.subscribe(ChangeLog())
+    mutate(doc, round_)
+    replica.patch(log.patch(), inplace=True)
+    doc.unsubscribe(log)
+
+
+def main():
+    """ Replicates the same number of changes both ways """
+    doc, replica = jdic(document(RECORDS)), jdic(document(RECORDS))
+    print('{} records, {} changes'.format(RECORDS, CHANGES))
+    print('    snapshot and diff():          {:10.1f} ms'.format(
+        timed(lambda: with_diff(doc, replica, 1))))
+    print('    again, the checksums cached:  {:10.1f} ms'.format(
+        timed(lambda: with_diff(doc, replica, 2))))
+    print('    ChangeLog:                    {:10.1f} ms'.format(
+        timed(lambda: with_log(doc, replica, 3))))
+    assert replica == doc
+
+
+if __name__ == '__main__':
+    main()
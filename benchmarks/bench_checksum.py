@@ -0,0 +1,46 @@
+"""
+Benchmarks the cost of checksum() after a single leaf update on a deep document.
+
+Run with: python benchmarks/bench_checksum.py
+"""
+import timeit
+from jdic import jdic
+
+DEPTH = 50
+WIDTH = 200
+NUMBER = 200
+
+
+def deep_document(depth=DEPTH, width=WIDTH):
+    """ Each level holds `width` leaves and one nested object """
+    doc = {}
+    node = doc
+    for _ in range(depth):
+        for i in range(width):
+            node['leaf{}'.format(i)] = 'value {}'.format(i)
+        node['next'] = {}
+        node = node['next']
+    node['leaf'] = 0
+    return doc
+
+
+def main():
+    """ Compares a full checksum to a checksum after a single deep leaf update """
+    fresh = iter([jdic(deep_document()) for _ in range(5)])
+    doc = jdic(deep_document())
+    doc.checksum()
+    path = '.'.join(['next'] * DEPTH + ['leaf'])
+    counter = iter(range(10 ** 9))
+
+    def update():
+        doc[path] = next(counter)
+        doc.checksum()
+
+    print('full checksum:                 {:.3f} ms'.format(
+        min(timeit.repeat(lambda: next(fresh).checksum(), number=1, repeat=5)) * 1000))
+    print('single leaf update + checksum: {:.3f} ms'.format(
+        timeit.timeit(update, number=NUMBER) / NUMBER * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Benchmarks documents holding large numeric sequences, with and without compact
+numeric sequences: memory, checksum(), equality and json().
+
+Run with: python benchmarks/bench_compact.py
+"""
+import json
+import random
+import time
+import tracemalloc
+from common import timed
+from jdic import loads, settings
+
+SERIES = 100
+POINTS = 10000
+
+
+def document(series=SERIES, points=POINTS):
+    """ Time series of ints and embeddings of floats """
+    rand = random.Random(0)
+    return {
+        'series': [[rand.randint(0, 1 << 40) for _ in range(points)] for _ in range(series)],
+        'embeddings': [[rand.random() for _ in range(points)] for _ in range(series)]
+    }
+
+
+def main():
+    """ Loads and uses the same document with both representations """
+    text = json.dumps(document())
+    for compact in [False, True]:
+        settings.compact_numeric_sequences = compact
+        tracemalloc.start()
+        start = time.perf_counter()
+        doc = loads(text)
+        elapsed = time.perf_counter() - start
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        other = loads(text)
+        print('compact={}'.format(compact))
+        print('    loads():    {:8.1f} ms  {:8.1f} MB'.format(elapsed * 1000, size / 1024 / 1024))
+        print('    checksum(): {:8.1f} ms'.format(timed(doc.checksum)))
+        print('    == :        {:8.1f} ms'.format(
+            timed(lambda: [a == b for a, b in zip(doc['series'], other['series'])])))
+        print('    json():     {:8.1f} ms'.format(timed(lambda: doc.json(indent=None))))
+    settings.compact_numeric_sequences = False
+
+
+if __name__ == '__main__':
+    main()
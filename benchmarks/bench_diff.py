@@ -0,0 +1,41 @@
+"""
+Benchmarks diff() between two mostly identical documents against json_delta on their raw
+copies (which is quadratic, hence the smaller document), then on a large document, then
+the array modes of diff() on a long array.
+
+Run with: python benchmarks/bench_diff.py
+"""
+import json_delta
+from common import document, timed
+from jdic import jdic
+
+RECORDS = 1000 # About 10 nodes each
+LARGE_RECORDS = 20000
+CHANGES = 10
+ITEMS = 20000
+
+
+def main():
+    """ Diffs documents with a few changes, then long arrays with a few insertions """
+    for records in [RECORDS, LARGE_RECORDS]:
+        left, right = jdic(document(records, by_id=True)), jdic(document(records, by_id=True))
+        for i in range(0, records, records // CHANGES):
+            right['records.{}.meta.score'.format(i)] = -1
+        print('{} records, {} changes'.format(records, CHANGES))
+        if records == RECORDS:
+            print('    json_delta on raw(): {:10.1f} ms'.format(
+                timed(lambda: json_delta.diff(left.raw(), right.raw(), verbose=False))))
+        print('    diff():              {:10.1f} ms'.format(timed(lambda: left.diff(right))))
+        print('    diff(), again:       {:10.1f} ms'.format(timed(lambda: left.diff(right))))
+    left = jdic({'items': [{'id': i} for i in range(ITEMS)]})
+    right = jdic({'items': [{'id': i} for i in range(ITEMS)]})
+    for i in range(ITEMS // 2, ITEMS, ITEMS // CHANGES // 2):
+        right['items'].insert(i, {'id': -1})
+    print('array of {} items, {} insertions'.format(ITEMS, CHANGES))
+    for arr_mode in ['align', 'index']:
+        print('    diff(arr_mode="{}"): {:10.1f} ms'.format(
+            arr_mode, timed(lambda: left.diff(right, arr_mode=arr_mode))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmarks the peak memory and throughput of dump() against json() on a large document. The
+peak memory is how much dumping raises the resident set size of the process, read from /proc
+(Linux only).
+
+Run with: python benchmarks/bench_dump.py
+"""
+import os
+import re
+import time
+from jdic import jdic
+
+RECORDS = 20000
+REPEAT = 3
+
+
+def large_document(records=RECORDS):
+    """ A list of records, each holding a few leaves and nested objects """
+    return {'records': [{
+        'id': i,
+        'name': 'record {}'.format(i),
+        'tags': ['tag{}'.format(i % 10), 'tag{}'.format(i % 7)],
+        'meta': {'score': i / 3.0, 'active': i % 2 == 0, 'owner': {'name': 'owner {}'.format(i)}}
+    } for i in range(records)]}
+
+
+def rss(field='VmRSS'):
+    """ Returns the resident set size of the current process (its peak with VmHWM), in bytes """
+    with open('/proc/self/status') as fp:
+        return int(re.search(field + r':\s+(\d+) kB', fp.read()).group(1)) * 1024
+
+
+def measure(func):
+    """ Returns the best duration of func, how much it raised the resident set size at its
+    peak, then the size written """
+    durations = []
+    for _ in range(REPEAT):
+        doc = jdic(large_document())
+        start = time.perf_counter()
+        size = func(doc)
+        durations.append(time.perf_counter() - start)
+    doc = jdic(large_document())
+    before = rss()
+    # Resets the peak, which the instantiation of the document raised
+    with open('/proc/self/clear_refs', 'w') as fp:
+        fp.write('5')
+    func(doc)
+    return min(durations), rss('VmHWM') - before, size
+
+
+def main():
+    """ Dumps the same document with json() and with dump() to a null file """
+    def with_json(doc):
+        with open(os.devnull, 'w') as fp:
+            return fp.write(doc.json(indent=2))
+
+    def with_dump(doc):
+        with open(os.devnull, 'w') as fp:
+            doc.dump(fp, indent=2)
+
+    duration, peak, size = measure(with_json)
+    print('json(): {:.3f} s, {:.1f} MB/s, peak RSS +{:.1f} MB'.format(
+        duration, size / duration / 2 ** 20, peak / 2 ** 20))
+    duration, peak, _ = measure(with_dump)
+    print('dump(): {:.3f} s, {:.1f} MB/s, peak RSS +{:.1f} MB'.format(
+        duration, size / duration / 2 ** 20, peak / 2 ** 20))
+
+
+if __name__ == '__main__':
+    main()
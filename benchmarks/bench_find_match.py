@@ -0,0 +1,55 @@
+"""
+Benchmarks find_match() against matching the query on every browsed object, with the
+query plan pre-filters alone and through the search index, on documents of about 10^5 and
+10^6 nodes.
+
+Run with: python benchmarks/bench_find_match.py
+"""
+from common import document, timed
+from jdic import jdic
+from jdic.drivers.mongo import Driver
+
+SIZES = [12000, 120000] # Records of about 9 nodes each
+NUMBER = 3
+QUERIES = [
+    {'status': 'disabled'},
+    {'meta.score': {'$gte': 6}, 'id': {'$lt': 1000}},
+    {'owner': {'$regex': '^owner 4'}},
+    {'$or': [{'status': 'disabled'}, {'score': 0}]},
+    {'id': {'$ne': 5}},
+]
+
+
+def naive(doc, query):
+    """ Evaluates the query on every object, as find_match() used to """
+    query = Driver.compile_query(query)
+    return [m for m in doc.browse() if Driver.match(m.value, query)]
+
+
+def run(records):
+    """ Runs the queries naively, with query planning and with the search index on a
+    document of records. The indexed document is only built once the other one is released """
+    doc = jdic(document(records))
+    print('records: {}, nodes: {}'.format(records, sum(1 for _ in doc.browse())))
+    results = []
+    for query in QUERIES:
+        expected = [m.path for m in naive(doc, query)]
+        assert [m.path for m in doc.find_match(query)] == expected
+        results.append((expected, timed(lambda: naive(doc, query), NUMBER),
+                        timed(lambda: list(doc.find_match(query)), NUMBER)))
+    del doc
+    doc = jdic(document(records)).index_search()
+    for query, (expected, naive_time, planned_time) in zip(QUERIES, results):
+        assert [m.path for m in doc.find_match(query)] == expected
+        print('{}\n    naive: {:8.1f} ms   planned: {:8.1f} ms   indexed: {:8.1f} ms'.format(
+            query, naive_time, planned_time, timed(lambda: list(doc.find_match(query)), NUMBER)))
+
+
+def main():
+    """ Runs the queries on documents of the different sizes """
+    for records in SIZES:
+        run(records)
+
+
+if __name__ == '__main__':
+    main()
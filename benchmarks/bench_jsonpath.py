@@ -0,0 +1,28 @@
+"""
+Benchmarks writes and deletions through wildcard JSONPath expressions over large arrays.
+
+Run with: python benchmarks/bench_jsonpath.py
+"""
+import timeit
+from jdic import jdic
+
+SIZES = [1000, 10000, 50000]
+
+
+def document(size):
+    """ An array of `size` small objects """
+    return {'a': [{'b': i, 'c': {'d': i}} for i in range(size)]}
+
+
+def main():
+    """ Times __setitem__ and __delitem__ with paths matching every element of the array """
+    for size in SIZES:
+        doc = jdic(document(size), driver='jsonpath_ng')
+        set_time = min(timeit.repeat(lambda: doc.__setitem__('a[*].c.d', 0), number=1, repeat=3))
+        del_time = timeit.timeit(lambda: doc.__delitem__('a[*].b'), number=1)
+        print('{:>6} elements: set {:8.1f} ms, del {:8.1f} ms'.format(
+            size, set_time * 1000, del_time * 1000))
+
+
+if __name__ == '__main__':
+    main()
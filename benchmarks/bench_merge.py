@@ -0,0 +1,67 @@
+"""
+Benchmarks merging small overrides into a large document, without and with a schema, one
+object at a time or several objects at once, and merging arrays of objects of growing sizes
+with arr_mode="new", which skips the objects already present.
+
+Run with: python benchmarks/bench_merge.py
+"""
+from common import document, timed
+from jdic import jdic
+
+RECORDS = 20000 # About 10 nodes each
+OVERRIDES = 10
+ARRAY_SIZES = [1000, 5000, 20000, 100000]
+NAIVE_MAX_SIZE = 1000 # Comparing each value with `in` takes minutes beyond
+SCHEMA = {
+    'type': 'object',
+    'properties': {'records': {'type': 'object', 'additionalProperties': {
+        'type': 'object',
+        'properties': {'id': {'type': 'integer'}, 'status': {'type': 'string'}}
+    }}}
+}
+
+
+def override(i):
+    """ A small override of the record i """
+    return {'records': {str(i): {'status': 'disabled', 'meta': {'score': -1}}}}
+
+
+def items(start, stop):
+    """ An array of objects, identified by their position in range(start, stop) """
+    return [{'id': i, 'tags': ['t{}'.format(i % 3)]} for i in range(start, stop)]
+
+
+def merge_naive(doc, with_arr):
+    """ The deduplication merge() used to make with arr_mode="new", value by value """
+    arr = doc['items']
+    for val in with_arr:
+        if val not in arr:
+            arr.append(val)
+
+
+def main():
+    """ Merges the same overrides in the different ways """
+    for schema in [None, SCHEMA]:
+        doc = jdic(document(RECORDS, by_id=True), schema=schema)
+        print('schema: {}'.format(schema is not None))
+        print('    merge(), 1 override:           {:10.1f} ms'.format(
+            timed(lambda: doc.merge(override(0)))))
+        print('    merge(), {} overrides, 1 by 1: {:10.1f} ms'.format(OVERRIDES, timed(
+            lambda: [doc.merge(override(i)) for i in range(OVERRIDES)])))
+        print('    merge(), {} overrides at once: {:10.1f} ms'.format(OVERRIDES, timed(
+            lambda: doc.merge([override(i) for i in range(OVERRIDES, 2 * OVERRIDES)]))))
+    print('arr_mode="new", half of the objects already present')
+    for size in ARRAY_SIZES:
+        doc = jdic({'items': items(0, size)})
+        with_obj = {'items': items(size // 2, size + size // 2)}
+        print('    {:6} objects, merge():       {:10.1f} ms'.format(
+            size, timed(lambda: doc.merge(with_obj, arr_mode='new'))))
+        assert len(doc['items']) == size + size // 2
+        if size <= NAIVE_MAX_SIZE:
+            doc = jdic({'items': items(0, size)})
+            print('    {:6} objects, `in` each:     {:10.1f} ms'.format(
+                size, timed(lambda: merge_naive(doc, with_obj['items']))))
+
+
+if __name__ == '__main__':
+    main()
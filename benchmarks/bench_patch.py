@@ -0,0 +1,58 @@
+"""
+Benchmarks applying a small delta to a large document, without and with a schema:
+rebuilding it from the patched raw copy as patch() used to, patching a copy and patching
+it in place. Then applies many deltas, validated after each one or once within a batch.
+
+Run with: python benchmarks/bench_patch.py
+"""
+import json_delta
+from common import document, timed
+from jdic import jdic
+
+RECORDS = 20000 # About 10 nodes each
+DELTAS = 20
+SCHEMA = {
+    'type': 'object',
+    'properties': {'records': {'type': 'array', 'items': {
+        'type': 'object',
+        'properties': {'id': {'type': 'integer'}, 'status': {'type': 'string'}}
+    }}}
+}
+
+
+def delta(i):
+    """ A delta of 3 stanzas modifying the record i """
+    return [[['records', i, 'meta', 'score'], -1], [['records', i, 'tags', 0], 'new', 'i'],
+            [['records', i, 'status'], 'disabled']]
+
+
+def patch_many(doc):
+    """ Applies DELTAS deltas in place, each of them being validated """
+    for i in range(DELTAS):
+        doc.patch(delta(i), inplace=True)
+
+
+def patch_batch(doc):
+    """ Applies DELTAS deltas in place within a batch, validated once """
+    with doc.batch():
+        for i in range(DELTAS):
+            doc.patch(delta(i), inplace=True)
+
+
+def main():
+    """ Applies the same deltas in the different ways """
+    for schema in [None, SCHEMA]:
+        doc = jdic(document(RECORDS), schema=schema)
+        print('schema: {}'.format(schema is not None))
+        print('    rebuilt from raw(): {:10.1f} ms'.format(timed(
+            lambda: jdic(json_delta.patch(doc.raw(), delta(0)), schema=schema))))
+        print('    patch(inplace=True):{:10.1f} ms'.format(
+            timed(lambda: doc.patch(delta(0), inplace=True))))
+        print('    patch():            {:10.1f} ms'.format(timed(lambda: doc.patch(delta(0)))))
+    print('{} deltas, schema: True'.format(DELTAS))
+    print('    one by one:         {:10.1f} ms'.format(timed(lambda: patch_many(doc))))
+    print('    within a batch:     {:10.1f} ms'.format(timed(lambda: patch_batch(doc))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+"""
+Benchmarks repeated reads of the same deep JSON paths, with and without the path index.
+
+Run with: python benchmarks/bench_path_index.py
+"""
+import timeit
+from jdic import jdic
+
+DEPTH = 10
+NUMBER = 20000
+
+
+def deep_document(depth=DEPTH):
+    """ Nested objects and lists, `depth` levels deep """
+    doc = {'leaf': 0}
+    for level in range(depth):
+        doc = {'k{}'.format(level): [{'x': level}, doc]}
+    return doc
+
+
+def main():
+    """ Reads the deepest leaf of the document over and over """
+    path = '.'.join('k{}.1'.format(level) for level in reversed(range(DEPTH))) + '.leaf'
+    for driver, read in [('mongo', path), ('jsonpath_ng', '$.' + path.replace('.1', '.[1]'))]:
+        plain = jdic(deep_document(), driver=driver)
+        indexed = jdic(deep_document(), driver=driver).index_paths()
+        assert plain[read] == indexed[read]
+        print('{:<12} without index: {:.2f} us'.format(driver, timeit.timeit(
+            lambda: plain[read], number=NUMBER) / NUMBER * 10 ** 6))
+        print('{:<12} with index:    {:.2f} us'.format(driver, timeit.timeit(
+            lambda: indexed[read], number=NUMBER) / NUMBER * 10 ** 6))
+        print('{:<12} index size:    {}'.format(driver, indexed.path_index_info()))
+
+
+if __name__ == '__main__':
+    main()
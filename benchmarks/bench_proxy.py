@@ -0,0 +1,41 @@
+"""
+Benchmarks the methods of dicts and lists called on Jdic objects: read-only calls followed
+by an export of the document to JSON, which is kept in cache, then many appends to a nested
+list, which stop invalidating the parents once they are dirty.
+
+Run with: python benchmarks/bench_proxy.py
+"""
+from common import document, timed
+from jdic import jdic
+
+RECORDS = 20000 # About 10 nodes each
+CALLS = 100
+APPENDS = 100000
+
+
+def read(doc):
+    """ Copies CALLS records, exporting the document after each copy """
+    for i in range(CALLS):
+        doc['records.{}.meta'.format(i)].copy()
+        doc.json()
+
+
+def append(doc):
+    """ Appends APPENDS tags to the last record """
+    tags = doc['records.{}.tags'.format(RECORDS - 1)]
+    for i in range(APPENDS):
+        tags.append(i)
+
+
+def main():
+    """ Calls read-only methods, then appends many values """
+    doc = jdic(document(RECORDS))
+    print('first json():            {:10.1f} ms'.format(timed(doc.json)))
+    print('{} copy() + json():      {:10.1f} ms'.format(CALLS, timed(lambda: read(doc))))
+    doc.checksum()
+    print('{} append():          {:10.1f} ms'.format(APPENDS, timed(lambda: append(doc))))
+    print('checksum() after them:   {:10.1f} ms'.format(timed(doc.checksum)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+"""
+Benchmarks find() and find_keys() with and without the search index.
+
+Run with: python benchmarks/bench_search_index.py
+"""
+from common import document, timed
+from jdic import jdic
+
+RECORDS = 5000
+NUMBER = 20
+
+
+def main():
+    """ Runs the same searches on a plain and on an indexed document """
+    plain = jdic(document(RECORDS))
+    indexed = jdic(document(RECORDS)).index_search()
+    searches = [
+        ('find("disabled")', lambda doc: list(doc.find('disabled'))),
+        ('find("owner 7", limit=1)', lambda doc: list(doc.find('owner 7', limit=1))),
+        ('find_keys("owner")', lambda doc: list(doc.find_keys('owner'))),
+    ]
+    for name, search in searches:
+        assert [m.path for m in search(plain)] == [m.path for m in search(indexed)]
+        print('{:<28} without index: {:8.3f} ms   with index: {:8.3f} ms'.format(
+            name,
+            timed(lambda: search(plain), NUMBER), timed(lambda: search(indexed), NUMBER)))
+    print('index size: {}'.format(indexed.search_index_info()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""
+Benchmarks taking a snapshot of a document with new() against a full copy, and the cost
+of the first modifications made after a snapshot.
+
+Run with: python benchmarks/bench_snapshot.py
+"""
+from common import document, timed
+from jdic import jdic
+
+RECORDS = 20000 # About 10 nodes each
+NUMBER = 5
+
+
+def mutate(doc, number):
+    """ Modifies number records spread over the document """
+    for i in range(0, RECORDS, RECORDS // number):
+        doc['records.{}.meta.score'.format(i)] = -1
+
+
+def snapshot_and_mutate(doc, number):
+    """ Snapshots the document for a rollback, then modifies it """
+    doc.new()
+    mutate(doc, number)
+
+
+def main():
+    """ Compares snapshots with full copies, then measures modifications after a snapshot """
+    doc = jdic(document(RECORDS))
+    print('nodes: {}'.format(sum(1 for _ in doc.browse())))
+    print('full copy, jdic(doc):   {:8.3f} ms'.format(timed(lambda: jdic(doc), NUMBER)))
+    print('snapshot, doc.new():    {:8.3f} ms'.format(timed(doc.new, NUMBER)))
+    for number in [1, 100]:
+        print('{} modification(s)'.format(number))
+        print('    without snapshot:   {:8.3f} ms'.format(
+            timed(lambda: mutate(doc, number), NUMBER)))
+        print('    after a snapshot:   {:8.3f} ms'.format(
+            timed(lambda: snapshot_and_mutate(doc, number), NUMBER)))
+        print('    after a full copy:  {:8.3f} ms'.format(
+            timed(lambda: (jdic(doc), mutate(doc, number)), NUMBER)))
+
+
+if __name__ == '__main__':
+    main()
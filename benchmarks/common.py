@@ -0,0 +1,31 @@
+"""
+Documents and timing shared by the benchmarks.
+"""
+import time
+
+
+def record(i):
+    """ The record i, holding a few leaves (about 1 in 100 "disabled"), a nested object and
+    a list """
+    return {
+        'id': i,
+        'status': 'active' if i % 100 else 'disabled',
+        'meta': {'owner': 'owner {}'.format(i % 50), 'score': i % 7},
+        'tags': ['t{}'.format(i % 3), 't{}'.format(i % 5)]
+    }
+
+
+def document(records, by_id=False):
+    """ A document holding records of about 10 nodes each, in a list or in an object by
+    identifier """
+    if by_id:
+        return {'records': {str(i): record(i) for i in range(records)}}
+    return {'records': [record(i) for i in range(records)]}
+
+
+def timed(func, number=1):
+    """ Returns the average time func() took over number calls, in milliseconds """
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    return (time.perf_counter() - start) / number * 1000
@@ -5,7 +5,14 @@ from .jdic import \
     Jdic, \
     JdicMapping, \
     JdicSequence, \
+    JdicMappingView, \
+    JdicSequenceView, \
     MatchResult, \
+    jdic_adopt as adopt, \
     jdic_create as jdic, \
-    jdic_enumerate as enumerate
-from . import settings
+    jdic_enumerate as enumerate, \
+    jdic_load as load, \
+    jdic_loads as loads
+from .changes import ChangeEvent, ChangeLog
+from .schema import CompiledSchema
+from . import batch, settings
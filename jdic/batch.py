@@ -0,0 +1,139 @@
+"""
+Runs Jdic operations over many documents in a pool of worker processes. The documents are
+shipped to the workers as JSON text, and only plain JSON results are sent back:
+
+    from jdic import batch
+    for checksum, errors, matches in batch.imap(docs, ['checksum', ('validate', schema),
+                                                       ('find_match', {'id': 1})]):
+        ...
+"""
+# pylint: disable=redefined-builtin
+from collections import deque
+import itertools
+import json
+import multiprocessing
+import jsonschema
+from .jdic import Jdic, jdic_loads
+from .schema import CompiledSchema
+
+OPERATIONS = ('checksum', 'find_match', 'validate')
+DEFAULT_CHUNKSIZE = 100
+# Chunks submitted to the pool per worker, ahead of the results read
+CHUNKS_AHEAD = 2
+
+# The operations and options of a worker process, see _init_worker()
+_worker = {}
+
+
+def _chunks(docs, chunksize):
+    """ Yields lists of chunksize documents at most, dumped into JSON text """
+    docs = iter(docs)
+    while True:
+        chunk = [_dump(doc) for doc in itertools.islice(docs, chunksize)]
+        if not chunk:
+            return
+        yield chunk
+
+
+def _dump(doc):
+    """ Returns doc as JSON text, which it may already be """
+    if isinstance(doc, (str, bytes)):
+        return doc
+    if isinstance(doc, Jdic):
+        return doc.json()
+    return json.dumps(doc)
+
+
+def _compile(ops):
+    """ Returns ops with the schemas of the validations compiled """
+    compiled = []
+    for name, args in ops:
+        if name == 'validate' and not isinstance(args[0], CompiledSchema):
+            args = (CompiledSchema(args[0]),)
+        compiled.append((name, args))
+    return compiled
+
+
+def _init_worker(ops, kwargs):
+    """ Prepares the operations run by the current worker process, compiling the schemas once """
+    _worker['ops'] = _compile(ops)
+    _worker['kwargs'] = kwargs
+
+
+def _operation(op):
+    """ Returns op as a (name, arguments) couple, op being a name or a (name, *args) tuple """
+    name, args = (op, ()) if isinstance(op, str) else (op[0], tuple(op[1:]))
+    if name not in OPERATIONS:
+        raise ValueError('Unknown batch operation "{}"'.format(name))
+    if name == 'validate' and len(args) != 1:
+        raise ValueError('The validate operation takes a schema')
+    return name, args
+
+
+def _run(doc, name, args):
+    """ Returns the plain JSON result of the operation name on doc """
+    if name == 'checksum':
+        return doc.checksum(*args)
+    if name == 'validate':
+        try:
+            doc.validate(*args)
+        except jsonschema.ValidationError as err:
+            return err.message
+        return None
+    return [[res.path, res.value.raw() if isinstance(res.value, Jdic) else res.value]
+            for res in doc.find_match(*args)]
+
+
+def _run_chunk(chunk, ops=None, kwargs=None):
+    """ Returns the results of the operations on each document of chunk, the ones of the
+    worker process unless ops and kwargs are given """
+    if ops is None:
+        ops, kwargs = _worker['ops'], _worker['kwargs']
+    results = []
+    for text in chunk:
+        doc = jdic_loads(text, **kwargs)
+        results.append([_run(doc, name, args) for name, args in ops])
+    return results
+
+
+def imap(docs, ops, workers=None, chunksize=DEFAULT_CHUNKSIZE, **kwargs):
+    """
+    Yields the results of the operations ops on each document of docs, in order, as lists
+    holding one result per operation. The operations are:
+    - "checksum", or ("checksum", algo): the checksum of the document
+    - ("validate", schema): None if the document is valid, the error message otherwise
+    - ("find_match", query, ...): the [path, value] couples matching query, the other
+      arguments being the ones of find_match()
+    docs may hold dicts, lists, Jdic objects or JSON text, and is only read as the results
+    are consumed: chunksize documents are sent to a worker at a time, and CHUNKS_AHEAD
+    chunks per worker at most are waiting for their results to be read. The documents are
+    loaded with kwargs as options (driver, lazy...), which must be picklable. With 0
+    workers, the operations run in the current process.
+    """
+    ops = [_operation(op) for op in ops]
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    if chunksize < 1:
+        raise ValueError('chunksize must be positive')
+    if not workers:
+        ops = _compile(ops)
+        for chunk in _chunks(docs, chunksize):
+            for result in _run_chunk(chunk, ops, kwargs):
+                yield result
+        return
+    # The pool is terminated as well when the generator is closed before its end
+    with multiprocessing.Pool(workers, _init_worker, (ops, kwargs)) as pool:
+        pending = deque()
+        for chunk in _chunks(docs, chunksize):
+            pending.append(pool.apply_async(_run_chunk, (chunk,)))
+            if len(pending) >= workers * CHUNKS_AHEAD:
+                for result in pending.popleft().get():
+                    yield result
+        while pending:
+            for result in pending.popleft().get():
+                yield result
+
+
+def map(docs, ops, workers=None, chunksize=DEFAULT_CHUNKSIZE, **kwargs):
+    """ Returns the results of imap() as a list """
+    return list(imap(docs, ops, workers, chunksize, **kwargs))
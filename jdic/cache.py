@@ -0,0 +1,53 @@
+""" Caching helpers shared by the Jdic drivers """
+
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """
+    A bounded mapping which evicts its least recently used entries. maxsize can be
+    a callable, so that the bound can follow a setting changed at runtime.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        """ Empties the cache and resets its counters """
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, factory):
+        """ Returns the value cached for key, creating it with factory() on a miss """
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._data.move_to_end(key)
+            return value
+        value = factory()
+        self._data[key] = value
+        maxsize = self.maxsize() if callable(self.maxsize) else self.maxsize
+        while len(self._data) > max(maxsize, 0):
+            self._data.popitem(last=False)
+        return value
+
+    def info(self):
+        """ Returns the counters of the cache, to help sizing it """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': float(self.hits) / lookups if lookups else 0.0,
+            'size': len(self._data),
+            'maxsize': self.maxsize() if callable(self.maxsize) else self.maxsize
+        }
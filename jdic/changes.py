@@ -0,0 +1,114 @@
+""" Change events sent by Jdic objects to their subscribers, and their compaction """
+
+from collections import namedtuple
+
+
+class ChangeEvent(namedtuple('ChangeEvent', ['path', 'op', 'old', 'new'])):
+    """
+    A change made within a subscribed Jdic object:
+    - path: the list of keys leading from the subscribed object to the changed value
+    - op: "set" (a value replaced), "add" (a key added to a mapping), "insert" (a value
+      inserted in a list, the next ones being shifted) or "delete"
+    - old: a raw copy of the value replaced or deleted, None if there was none
+    - new: a raw copy of the value set, added or inserted, None for deletions
+    The raw copies are shared by the events sent to the different subscribers.
+    """
+    __slots__ = ()
+
+    def shifts(self):
+        """ Returns True if the change shifted the indexes of the next values of a list """
+        return self.op == 'insert' or (self.op == 'delete' and bool(self.path) and
+                                       isinstance(self.path[-1], int))
+
+    def stanza(self):
+        """ Returns the stanza replaying the change with patch() """
+        if self.op == 'delete':
+            return [list(self.path)]
+        if self.op == 'insert':
+            return [list(self.path), self.new, 'i']
+        return [list(self.path), self.new]
+
+
+def _coalesce(changes, index, event):
+    """
+    Coalesces event with changes[index], the previous change made at the same path. Returns
+    the event left to record (None if there is none), and whether the changes made before
+    may be coalesced with it as well.
+    """
+    change = changes[index]
+    if change.shifts():
+        if change.op == 'insert' and event.op == 'set':
+            changes[index] = change._replace(new=event.new)
+            return None, False
+        return event, False
+    if change.op == 'add':
+        # The key did not exist before the changes
+        if event.op == 'delete':
+            del changes[index]
+        else:
+            changes[index] = change._replace(new=event.new)
+        return None, False
+    del changes[index]
+    if change.op == 'delete':
+        # The key existed before the changes
+        event = event._replace(op='set')
+    return event, True
+
+
+def compact_changes(events):
+    """
+    Returns the shortest diff stanzas replaying events with patch(). The changes made to a
+    value which is set or deleted later on, or to one of its sub-values, are left out unless
+    the indexes of a list along its path were shifted in between.
+    """
+    changes = []
+    for event in events:
+        path = list(event.path)
+        event = event._replace(path=path)
+        index = len(changes)
+        while event is not None and event.op != 'insert' and index:
+            index -= 1
+            change = changes[index]
+            if change.path[:len(path)] != path:
+                if path[:len(change.path)] == change.path:
+                    break # A parent was replaced as a whole
+                if change.shifts() and change.path[:-1] == path[:len(change.path) - 1]:
+                    break # The earlier changes may not be at path anymore
+                continue
+            if change.path != path:
+                del changes[index] # A sub-value, replaced or deleted along with path
+                continue
+            event, further = _coalesce(changes, index, event)
+            if not further:
+                break
+        if event is not None:
+            changes.append(event)
+    return [change.stanza() for change in changes]
+
+
+class ChangeLog(object):
+    """
+    A subscriber recording the changes made to a Jdic object, to replay them on a copy:
+
+        log = j.subscribe(ChangeLog())
+        ...
+        copy.patch(log.patch(), inplace=True)
+        log.clear()
+    """
+
+    def __init__(self):
+        self.events = []
+
+    def __call__(self, event):
+        self.events.append(event)
+
+    def __len__(self):
+        return len(self.events)
+
+    def clear(self):
+        """ Forgets the events recorded """
+        self.events = []
+
+    def patch(self):
+        """ Returns the recorded events compacted into a diff, see compact_changes() """
+        return compact_changes(self.events)
@@ -4,12 +4,41 @@ from collections import Mapping, Sequence
 from jsonpath_ng import jsonpath, parse
 from mongoquery import Query
 import jdic.drivers.mongo
+from jdic import settings
+from jdic.cache import LRUCache
 
 class Driver(jdic.drivers.mongo.Driver):
     """ The driver class for Jdic objects """
     _root_strings = ['$']
     _invalid_keys_startswith = ['$']
     _invalid_keys_contains = ['`', ']', '[', '$', '*', '.']
+    _expressions = LRUCache(lambda: settings.json_path_cache_size)
+
+    @classmethod
+    def _is_static(cls, expr):
+        """ True if expr is a chain of single fields and positive indexes, which always
+        points to the same location within a document """
+        if isinstance(expr, jsonpath.Child):
+            return cls._is_static(expr.left) and cls._is_static(expr.right)
+        if isinstance(expr, (jsonpath.Root, jsonpath.This)):
+            return True
+        if isinstance(expr, jsonpath.Fields):
+            return len(expr.fields) == 1 and expr.fields[0] != '*'
+        if isinstance(expr, jsonpath.Index):
+            indices = getattr(expr, 'indices', None) or (expr.index,)
+            return len(indices) == 1 and indices[0] >= 0
+        return False
+
+    @staticmethod
+    def _match_key(match_path, parent, path):
+        """ Returns the key under which a match was found within its parent """
+        if isinstance(match_path, jsonpath.Fields) and len(match_path.fields) == 1:
+            return match_path.fields[0]
+        if isinstance(match_path, jsonpath.Index):
+            indices = getattr(match_path, 'indices', None) or (match_path.index,)
+            if len(indices) == 1:
+                return indices[0] + len(parent) if indices[0] < 0 else indices[0]
+        raise Exception('NoParent', 'No parent for path {}'.format(path))
 
     @classmethod
     def add_to_path(cls, path, key):
@@ -20,6 +49,13 @@ class Driver(jdic.drivers.mongo.Driver):
             path = path + '.{}'.format(key) if path else key
         return path
 
+    @classmethod
+    def compile_path(cls, path):
+        """ Returns the parsed JSONPath expression of path, parsed expressions are cached """
+        if isinstance(path, jsonpath.JSONPath):
+            return path
+        return cls._expressions.get(path, lambda: parse(path))
+
     @classmethod
     def control_invalid_key(cls, key):
         # pylint: disable=duplicate-code
@@ -37,31 +73,36 @@ class Driver(jdic.drivers.mongo.Driver):
     def get_new_path():
         return '$'
 
-    @staticmethod
-    def get_parent(obj, path):
-        jsonpath_expr = parse(path)
-        childs_path = [m.full_path for m in jsonpath_expr.find(obj)]
+    @classmethod
+    def get_parent(cls, obj, path):
         parents = []
-        for c_path in childs_path:
-            c_path = str(c_path)
-            keys = c_path.split('.')
-            key = keys[-1]
-            parent_path = '.'.join(keys[:-1])
-            jsonpath_expr = parse(parent_path)
-            try:
-                parent = [m.value for m in jsonpath_expr.find(obj)][0]
-            except:
-                raise Exception('NoParent', 'No parent for path {}'.format(parent_path))
-            parents.append((parent, key))
+        for match in cls.compile_path(path).find(obj):
+            if match.context is None:
+                raise Exception('NoParent', 'No parent for path {}'.format(path))
+            parent = match.context.value
+            parents.append((parent, cls._match_key(match.path, parent, path)))
         return parents
 
+    @classmethod
+    def get_static_parent(cls, obj, path):
+        if not cls._is_static(cls.compile_path(path)):
+            return None
+        parents = cls.get_parent(obj, path)
+        return parents[0] if len(parents) == 1 else None
+
     @staticmethod
-    def get_value_at_path(obj, path):
-        jsonpath_expr = parse(path)
+    def get_value_at_parent(parent, key):
+        return [parent[key]]
+
+    @classmethod
+    def get_value_at_path(cls, obj, path):
+        jsonpath_expr = cls.compile_path(path)
         return [m.value for m in jsonpath_expr.find(obj)]
 
     @classmethod
     def is_a_path(cls, key):
+        if isinstance(key, jsonpath.JSONPath):
+            return True
         if isinstance(key, str):
             for char in cls._invalid_keys_contains:
                 if key.find(char) != -1:
@@ -78,6 +119,11 @@ class Driver(jdic.drivers.mongo.Driver):
                 path += '.{}'.format(key)
         return path
 
+    @classmethod
+    def path_cache_info(cls):
+        """ Returns the hits, misses and size counters of the parsed expressions cache """
+        return cls._expressions.info()
+
     @staticmethod
     def path_to_keys(path):
         if not isinstance(path, str):
@@ -1,14 +1,142 @@
 """The Mongo driver for Jdic"""
 
+import re
 from collections import Mapping, Sequence
 from mongoquery import Query
 from jdic import jdic
+from jdic import settings
+from jdic.cache import LRUCache
+
+class CompiledQuery(Query): # pylint: disable=abstract-method
+    """A mongo query prepared once, to be matched against many objects.
+    Regular expressions given as strings are compiled beforehand."""
+
+    def __init__(self, definition):
+        super().__init__(self._prepare(definition))
+        self.definition = definition
+        self.plan = None
+
+    @classmethod
+    def _prepare(cls, condition):
+        if isinstance(condition, Mapping):
+            prepared = {}
+            for key, val in condition.items():
+                if key == '$regex' and isinstance(val, str):
+                    prepared[key] = cls._prepare_regex(val)
+                else:
+                    prepared[key] = cls._prepare(val)
+            return prepared
+        if isinstance(condition, list):
+            return [cls._prepare(val) for val in condition]
+        return condition
+
+    @staticmethod
+    def _prepare_regex(condition):
+        """Compiles a "/exp/flags" or "exp" regex the way mongoquery interprets it"""
+        regex = re.match(r"\A/(.+)/([imsx]{,4})\Z", condition, flags=re.DOTALL)
+        flags = 0
+        if regex:
+            for option in regex.group(2):
+                flags |= getattr(re, option.upper())
+            condition = regex.group(1)
+        try:
+            return re.compile(condition, flags)
+        except re.error:
+            return condition
+
+
+class QueryPlan(object):
+    """What the objects matching a mongo query must look like, so that the objects which
+    cannot match are skipped without evaluating the query:
+    - required_keys: the keys any mapping must contain to match
+    - sequences: False if no sequence holding only leaves can match
+    - strings: False if no string can match, other leaves never match"""
+    # pylint: disable=too-few-public-methods
+    __slots__ = ['required_keys', 'sequences', 'strings']
+    _FAIL, _PASS, _UNKNOWN = 'fail', 'pass', 'unknown'
+    _comparisons = frozenset(['$eq', '$gt', '$gte', '$lt', '$lte'])
+
+    def __init__(self, definition):
+        self.required_keys = frozenset()
+        self.sequences = True
+        self.strings = True
+        if isinstance(definition, Mapping):
+            required, values, sequences = self._required(definition)
+            self.required_keys = frozenset(required)
+            self.sequences = not sequences
+            self.strings = not values
+
+    @staticmethod
+    def _is_list(obj):
+        return isinstance(obj, Sequence) and not isinstance(obj, str)
+
+    @classmethod
+    def _required(cls, query):
+        """Returns the keys a mapping must hold to match query, the keys whose value (not
+        only the presence) must be checked, and the keys no sequence of leaves can match"""
+        required, values, sequences = set(), set(), set()
+        for key, condition in query.items():
+            if key in ('$and', '$or') and isinstance(condition, list) and condition and \
+               all(isinstance(sub, Mapping) for sub in condition):
+                subs = [cls._required(sub) for sub in condition]
+                merge = set.union if key == '$and' else set.intersection
+                required |= merge(*[sub[0] for sub in subs])
+                values |= merge(*[sub[1] for sub in subs])
+                sequences |= merge(*[sub[2] for sub in subs])
+            elif isinstance(key, str) and not key.startswith('$'):
+                field = key.split('.')[0]
+                if isinstance(condition, Mapping) and '$exists' in condition:
+                    if condition['$exists']:
+                        required.add(field)
+                elif cls._on_undefined(condition) == cls._FAIL:
+                    required.add(field)
+                    values.add(field)
+                    if not field.isdigit() and \
+                       cls._on_undefined(condition, many=True) == cls._FAIL:
+                        sequences.add(field)
+        return required, values, sequences
+
+    @classmethod
+    def _on_undefined(cls, condition, many=False):
+        """Tells if condition fails or passes on a missing value (or on a list of missing
+        values when many is True), or if it cannot be known without evaluating it"""
+        # pylint: disable=too-many-return-statements,too-many-branches
+        if not isinstance(condition, Mapping):
+            return cls._UNKNOWN if many and cls._is_list(condition) else cls._FAIL
+        for key, sub in condition.items():
+            if key in cls._comparisons:
+                return cls._UNKNOWN if many and cls._is_list(sub) else cls._FAIL
+            if key == '$regex':
+                return cls._FAIL
+            if key in ('$elemMatch', '$size') and not many and \
+               (key == '$elemMatch' or isinstance(sub, int)):
+                return cls._FAIL
+            if key == '$in' and cls._is_list(sub):
+                if many and any(cls._is_list(item) for item in sub):
+                    return cls._UNKNOWN
+                return cls._FAIL
+            if key == '$all' and isinstance(sub, list) and sub and \
+               not isinstance(sub[0], Mapping):
+                return cls._UNKNOWN if many and cls._is_list(sub[0]) else cls._FAIL
+            if key == '$and' and isinstance(sub, list):
+                for result in [cls._on_undefined(item, many) for item in sub]:
+                    if result != cls._PASS:
+                        return result
+                continue
+            if key == '$or' and isinstance(sub, list) and sub and \
+               all(cls._on_undefined(item, many) == cls._FAIL for item in sub):
+                return cls._FAIL
+            if key != '$comment':
+                return cls._UNKNOWN
+        return cls._PASS
+
 
 class Driver(object):
     """The driver class"""
     _root_strings = ['']
     _invalid_keys_startswith = ['$']
     _invalid_keys_contains = ['.']
+    _queries = LRUCache(lambda: settings.query_cache_size)
 
     @staticmethod
     def _control_str_int_key(key):
@@ -17,6 +145,17 @@ class Driver(object):
         if not isinstance(key, str) and not isinstance(key, int):
             raise KeyError('Forbidden key type "{}"'.format(type(key)))
 
+    @classmethod
+    def _canonical_query(cls, query):
+        """Returns a hashable form of query, equal for equal queries whatever the keys
+        order. Raises TypeError if query holds unhashable values."""
+        if isinstance(query, Mapping):
+            return ('{', tuple(sorted((k, cls._canonical_query(v)) for k, v in query.items())))
+        if isinstance(query, (list, tuple)):
+            return ('[', tuple(cls._canonical_query(v) for v in query))
+        hash(query)
+        return (type(query).__name__, query)
+
     @classmethod
     def _control_startswith(cls, key):
         if not isinstance(key, str):
@@ -53,6 +192,18 @@ class Driver(object):
             return path + '.' + str(key)
         return str(key)
 
+    @classmethod
+    def compile_query(cls, query):
+        """Returns a compiled query which can be passed to match() in place of query.
+        Compiled queries are cached, see query_cache_info()"""
+        if isinstance(query, CompiledQuery):
+            return query
+        try:
+            key = cls._canonical_query(query)
+        except TypeError:
+            return CompiledQuery(query)
+        return cls._queries.get(key, lambda: CompiledQuery(query))
+
     @classmethod
     def control_invalid_key(cls, key):
         """ Raises an exception if a key format is not valid """
@@ -81,6 +232,26 @@ class Driver(object):
                 break
         raise Exception('NoParent', 'No parent for path {}'.format(path))
 
+    @classmethod
+    def get_static_parent(cls, obj, path):
+        """Returns the (parent, key) couple of the single value pointed by JSON path, as
+        long as the parent exists. None if it does not, or if the path may point to other
+        values after the document changes"""
+        keys = cls.path_to_keys(path)
+        try:
+            for k in keys[:-1]:
+                k, obj = cls._key_obj(k, obj)
+                obj = obj[k]
+            key, obj = cls._key_obj(keys[-1], obj)
+        except (KeyError, IndexError, TypeError, ValueError):
+            return None
+        return (obj, key)
+
+    @staticmethod
+    def get_value_at_parent(parent, key):
+        """Returns the value found at key within parent, as get_value_at_path() would"""
+        return parent[key]
+
     @classmethod
     def get_value_at_path(cls, obj, path):
         """Returns the value pointed by JSON path"""
@@ -110,13 +281,26 @@ class Driver(object):
             path += '.'+str(k) if path else str(k)
         return path
 
-    @staticmethod
-    def match(obj, query):
-        """Returns True if object matches the mongo query, else False"""
+    @classmethod
+    def match(cls, obj, query):
+        """Returns True if object matches the mongo query (or compiled query), else False"""
         if not isinstance(obj, Sequence) and not isinstance(obj, Mapping):
             return False
-        query = Query(query)
-        return query.match(obj)
+        return cls.compile_query(query).match(obj)
+
+    @classmethod
+    def plan_query(cls, query):
+        """Returns the QueryPlan of a compiled query, None if objects cannot be skipped"""
+        if not isinstance(query, CompiledQuery):
+            return None
+        if query.plan is None:
+            query.plan = QueryPlan(query.definition)
+        return query.plan if query.plan.required_keys else None
+
+    @classmethod
+    def query_cache_info(cls):
+        """Returns the hits, misses and size counters of the compiled queries cache"""
+        return cls._queries.info()
 
     @staticmethod
     def path_to_keys(path):
@@ -0,0 +1,157 @@
+""" Indexes kept by Jdic objects to speed up repeated lookups """
+
+import sys
+
+
+class _PathNode(object):
+    """ A node of the tree of keys leading to the parents of indexed paths """
+    # pylint: disable=too-few-public-methods
+    __slots__ = ['paths', 'children']
+
+    def __init__(self):
+        self.paths = set()
+        self.children = {}
+
+
+class PathIndex(object):
+    """
+    Maps JSON paths to the (parent, key) couple they resolve to. The entries are also
+    filed in a tree following the keys leading to the value they point to, so that
+    replacing or shifting an object drops the paths going through it at once.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._tree = _PathNode()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _drop_node(self, node):
+        """ Drops the paths filed under node and its descendants """
+        nodes = [node]
+        while nodes:
+            node = nodes.pop()
+            for path in node.paths:
+                del self._entries[path]
+            nodes.extend(node.children.values())
+            node.paths = set()
+            node.children = {}
+
+    def add(self, path, keys, entry):
+        """ Indexes path, keys leading from the indexing object to the value of entry """
+        node = self._tree
+        for key in keys:
+            if key not in node.children:
+                node.children[key] = _PathNode()
+            node = node.children[key]
+        node.paths.add(path)
+        self._entries[path] = entry
+
+    def clear(self):
+        """ Empties the index """
+        self._entries = {}
+        self._tree = _PathNode()
+
+    def drop(self, trail):
+        """
+        Drops the paths which may not resolve to their entry anymore, once the key found at
+        the end of trail was modified. trail is a linked (key, trail) tuple leading to the
+        modified key, which is None when the whole object at the end of trail changed.
+        """
+        node = self._tree
+        while trail is not None:
+            key, trail = trail
+            if key is None:
+                self._drop_node(node)
+                return
+            if key not in node.children:
+                return
+            if trail is None:
+                self._drop_node(node.children.pop(key))
+                return
+            node = node.children[key]
+
+    def get(self, path):
+        """ Returns the (parent, key) couple indexed for path, None if it is not indexed """
+        return self._entries.get(path)
+
+    def info(self):
+        """ Returns the number of paths and nodes of the index, and its approximate size """
+        size = sys.getsizeof(self._entries)
+        for path, entry in self._entries.items():
+            size += sys.getsizeof(path) + sys.getsizeof(entry)
+        nodes = [self._tree]
+        nb_nodes = 0
+        while nodes:
+            node = nodes.pop()
+            nb_nodes += 1
+            size += sys.getsizeof(node) + sys.getsizeof(node.paths) + \
+                    sys.getsizeof(node.children)
+            nodes.extend(node.children.values())
+        return {
+            'paths': len(self._entries),
+            'nodes': nb_nodes,
+            'memory': size
+        }
+
+
+class SearchIndex(object):
+    """
+    Inverted indexes of a Jdic: leaf values to the (parent, key) couples holding them,
+    keys to the mappings containing them, and the sequences it holds. Entries are only
+    added as the document changes, the stale ones are dropped when they are looked up,
+    or all at once when the index is rebuilt.
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.keys = {}
+        self.sequences = {}
+        self.added = 0
+        self.built = 0
+
+    def add_key(self, key, mapping):
+        """ Indexes mapping as containing key """
+        self.keys.setdefault(key, {})[id(mapping)] = mapping
+        self.added += 1
+
+    def add_sequence(self, sequence):
+        """ Indexes a sequence """
+        self.sequences[id(sequence)] = sequence
+        self.added += 1
+
+    def add_value(self, value, parent, key):
+        """ Indexes value as found at key within parent """
+        self.values.setdefault(value, {})[(id(parent), key)] = (parent, key)
+        self.added += 1
+
+    def clear(self):
+        """ Empties the index """
+        self.values = {}
+        self.keys = {}
+        self.sequences = {}
+        self.added = 0
+        self.built = 0
+
+    def info(self):
+        """ Returns the number of values, keys and entries of the index, and its size """
+        size = sys.getsizeof(self.values) + sys.getsizeof(self.keys) + \
+               sys.getsizeof(self.sequences)
+        entries = len(self.sequences)
+        for index in [self.values, self.keys]:
+            for key, bucket in index.items():
+                entries += len(bucket)
+                size += sys.getsizeof(key) + sys.getsizeof(bucket)
+                if index is self.values:
+                    size += sum(sys.getsizeof(ident) for ident in bucket)
+        return {
+            'values': len(self.values),
+            'keys': len(self.keys),
+            'entries': entries,
+            'memory': size
+        }
+
+    def needs_rebuild(self):
+        """ True once the entries added since the last build outnumber the built ones """
+        return self.added > 2 * self.built + 1024
@@ -3,14 +3,21 @@ The Jdic module provides the features required to manipulate
 JSON objects through a consistent API.
 """
 from __future__ import unicode_literals
+import array
+import difflib
 import json
 import hashlib
 import importlib
+import math
+import mmap
 from collections import Sequence, Mapping
-import json_delta
+from contextlib import contextmanager
 import jsonschema
 from . import drivers # pylint: disable=unused-import
 from . import settings
+from .changes import ChangeEvent
+from .index import PathIndex, SearchIndex
+from .schema import CompiledSchema
 
 JSON_ITERABLES = [
     Mapping,
@@ -25,25 +32,56 @@ JSON_LEAVES = [
     type(None)
 ]
 
-class MatchResult(object):
-    """ Wraps the results of searches and browses within Jdic objects """
-    # pylint: disable=too-few-public-methods
+# Kinds of JSON values, by exact type. Other types are classified once with the ABCs
+_OTHER, _LEAF, _MAPPING, _SEQUENCE = range(4)
+_TYPE_KINDS = {ltype: _LEAF for ltype in JSON_LEAVES}
+# array.array backs compact numeric sequences, and is only a Sequence from Python 3.10
+_TYPE_KINDS.update({dict: _MAPPING, list: _SEQUENCE, array.array: _SEQUENCE})
+if not issubclass(array.array, Sequence):
+    Sequence.register(array.array)
+
+# Type codes of the arrays backing compact numeric sequences, by type of their items
+ARRAY_TYPECODES = {
+    int: 'q',
+    float: 'd'
+}
 
-    def __init__(self, **kwargs):
-        self._obj = {}
-        for k in kwargs:
-            setattr(self, k, kwargs[k])
-            self._obj[k] = kwargs[k]
+class MatchResult(object):
+    """
+    Wraps the results of searches and browses within Jdic objects. The path of the result
+    is only built from its parent path and key when it is first read.
+    """
+    # pylint: disable=too-few-public-methods,too-many-arguments
+    __slots__ = ['parent', 'parent_path', 'key', 'value', 'depth', '_path', '_driver']
+    _fields = ('parent', 'parent_path', 'key', 'value', 'path', 'depth')
+
+    def __init__(self, parent=None, parent_path=None, key=None, value=None, path=None,
+                 depth=None, driver=None):
+        self.parent = parent
+        self.parent_path = parent_path
+        self.key = key
+        self.value = value
+        self.depth = depth
+        self._path = path
+        self._driver = driver
 
     def __str__(self):
-        return str(self._obj)
+        return str({field: getattr(self, field) for field in self._fields})
 
     def __iter__(self):
-        yield from self._obj.__iter__()
+        yield from self._fields
 
     def __getitem__(self, item):
-        return self._obj[item]
+        if item not in self._fields:
+            raise KeyError(item)
+        return getattr(self, item)
 
+    @property
+    def path(self):
+        """ The full JSON path of the result """
+        if self._path is None and self._driver is not None:
+            self._path = self._driver.add_to_path(self.parent_path, self.key)
+        return self._path
 
 
 class Jdic(object):
@@ -62,25 +100,34 @@ class Jdic(object):
         'items',
         'values'
     ]
+    # Incremented whenever a cache is filled, which outdates the dirty flags, see _flag_modified()
+    _cache_epoch = 0
 
     ##
     # CLASS OPERATORS
     ##
 
-    def __init__(self, iterable, schema=None, serializer=None, driver=None,
-                 _parent=None, _key=None):
+    def __init__(self, iterable, schema=None, serializer=None, driver=None, lazy=None,
+                 trusted=None, _parent=None, _key=None, _serialized=False):
         """ Instantiates a Generic Jdic object.
 
         iterable: the core data to be contained within a Jdic (usually dict or list)
-        schema: a JSON schema which may be used for automatic validation of data
+        schema: a JSON schema (or CompiledSchema) which may be used for automatic validation
+                of data
         serializer: a function which might be used for custom-made data-to-JSON serialization
         driver: the class which implements the driver features
+        lazy: if True, nested iterables are kept raw and only wrapped into Jdic objects
+              when they are accessed for the first time
+        trusted: if True, iterable is known to hold plain JSON data only, and the custom
+                 serializers are not called on its values
         _parent: used internally to attach a new Jdic to another. Within a JSON hierarchy all
                  iterables are Jdic objects.
         _key: used internally to indicate under which key (or index) the new Jdic is attached
               within its parent.
+        _serialized: used internally when iterable is plain JSON data which already went
+                     through serialization, and which is adopted by the Jdic without any copy.
         """
-        # pylint: disable=protected-access
+        # pylint: disable=protected-access,too-many-arguments
         self._parent = _parent
         self._key = _key
         # Load / Inherit driver first
@@ -96,19 +143,39 @@ class Jdic(object):
         if self._parent is None:
             self._path = self._driver.get_new_path()
             self._serializer = serializer
+            self._lazy = settings.lazy_wrapping if lazy is None else lazy
+            self._trusted = settings.trusted_input if trusted is None else trusted
             self._depth = 0
         else:
             self._path = self._driver.add_to_path(self._parent._path, self._key)
             self._serializer = self._parent._serializer if serializer is None else serializer
+            self._lazy = self._parent._lazy if lazy is None else lazy
+            self._trusted = self._parent._trusted if trusted is None else trusted
             self._depth = self._parent._depth + 1
-        self._schema = schema
+        self._schema = schema if schema is None or isinstance(schema, CompiledSchema) \
+                       else CompiledSchema(schema)
+        self._batch_depth = 0
         self._cache = {}
+        # Per-key checksum entries outlive _flag_modified(), only stale keys are refreshed
+        self._checksum_entries = None
+        self._checksum_order = None
+        self._checksum_stale = set()
+        self._path_index = None
+        self._search_index = None
+        self._subscribers = None
+        # _cache_epoch when the parents were last invalidated, see _flag_modified()
+        self._dirty = None
+        # Whether the container may be shared with snapshots, see _share()
+        self._shared = False
         # Dereference or cast to strict Json
         if isinstance(iterable, Jdic):
             iterable = iterable._obj
-        self._obj = self._serialize_to_jdic(iterable, parent=self)
+        if _serialized:
+            self._obj = self._adopt(iterable)
+        else:
+            self._obj = self._serialize_to_jdic(iterable, parent=self)
         if self._schema:
-            self.validate(self._schema)
+            self.validate()
 
     def __copy__(self):
         return self.new()
@@ -119,44 +186,72 @@ class Jdic(object):
     def __delitem__(self, path):
         # pylint: disable=protected-access
         if self._driver.is_root_path(path):
-            if isinstance(self._obj, Mapping):
-                self._obj = {}
-            else:
-                self._obj = []
-            self._flag_modified()
+            self._jdic_reload({} if isinstance(self._obj, Mapping) else [])
             return
         if self._driver.is_a_path(path):
-            parents = self._driver.get_parent(self._obj, path)
+            parents = self._get_parents(path)
         else:
             parents = [(self, path)]
         for parent, key in parents:
-            del parent._obj[key]
-            parent._flag_modified()
+            parent._delete(key)
 
     def __eq__(self, obj):
+        # pylint: disable=protected-access
         if isinstance(obj, Jdic):
+            if isinstance(self._obj, array.array) and isinstance(obj._obj, array.array):
+                return self._obj.typecode == obj._obj.typecode and self._obj == obj._obj
             return self.checksum() == obj.checksum()
         elif self._is_iterable(obj):
             return self.checksum() == jdic_create(obj).checksum()
         return False
 
     def __getattr__(self, attr):
-        attr = getattr(self._obj, attr)
-        if attr not in self._attr_whitelist:
-            self._flag_modified()
-        return attr
+        if attr in self._attr_whitelist:
+            if self._shared:
+                self._own() # The children returned must be attached to the current object
+            if isinstance(self._obj, array.array) and not hasattr(self._obj, attr):
+                self._obj = self._obj.tolist()
+            return getattr(self._obj, attr)
+        method = getattr(list if isinstance(self._obj, array.array) else self._obj, attr)
+        if not callable(method):
+            return method
+
+        def mutator(*args, **kwargs):
+            """ Calls the method of the container, then invalidates the caches """
+            self._own()
+            if isinstance(self._obj, array.array):
+                self._obj = self._obj.tolist() # Methods of lists may modify it or be missing
+            before = None
+            if self._subscribed():
+                before = dict(self._obj) if isinstance(self._obj, Mapping) else self._obj[:]
+            try:
+                return getattr(self._obj, attr)(*args, **kwargs)
+            finally:
+                try:
+                    self._flag_modified()
+                finally:
+                    if before is not None:
+                        self._notify_container(before)
+        return mutator
 
     def __getitem__(self, item):
         if self._driver.is_root_path(item):
             return self
         if self._driver.is_a_path(item):
-            return self._driver.get_value_at_path(self._obj, item)
+            entry = self._indexed_parent(item)
+            if entry is not None:
+                return self._driver.get_value_at_parent(*entry)
+            return self._driver.get_value_at_path(self, item)
         if isinstance(self._obj, Mapping):
-            return self._obj[str(item)]
-        return self._obj[int(item)]
+            return self._child(str(item))
+        return self._child(int(item))
 
     def __iter__(self):
-        yield from self._obj.__iter__()
+        if isinstance(self._obj, Mapping):
+            yield from self._obj.__iter__()
+        else:
+            for _, val in self.enumerate():
+                yield val
 
     def __len__(self):
         return len(self._obj)
@@ -168,14 +263,11 @@ class Jdic(object):
                 raise ValueError('Cannot reassign object to non iterable "{}"'.format(type(value)))
             self._jdic_reload(value)
         if self._driver.is_a_path(path):
-            parents = self._driver.get_parent(self._obj, path)
+            parents = self._get_parents(path)
         else:
             parents = [(self, path)]
         for parent, key in parents:
-            if self._is_iterable(value):
-                value = jdic_create(value, _parent=parent, _key=key)
-            parent._obj[key] = value
-            parent._flag_modified()
+            value = parent._set(key, value)
 
     def __str__(self):
         return self.json(sort_keys=settings.json_dump_sort_keys,
@@ -187,45 +279,481 @@ class Jdic(object):
     # UNDERLYING FUNCTIONS
     ##
 
-    def _flag_modified(self):
+    def _adopt(self, obj):
+        """ Takes ownership of serialized JSON data, nested dicts and lists are wrapped in place """
+        if not self._lazy:
+            for key, val in obj.items() if isinstance(obj, dict) else enumerate(obj):
+                if type(val) in (dict, list): # pylint: disable=unidiomatic-typecheck
+                    obj[key] = jdic_create(val, _parent=self, _key=key, _serialized=True)
+        return self._compact(obj)
+
+    def _browse_position(self, keys, sort):
+        """ Returns a tuple ordering the entry found at keys (from the current object) as
+        browse() would yield it """
+        # pylint: disable=protected-access
+        if sort:
+            return tuple(keys)
+        position = []
+        node = self
+        for key in keys:
+            if isinstance(node, Jdic) and isinstance(node._obj, Mapping):
+                if 'positions' not in node._cache:
+                    node._cache_fill('positions', {k: i for i, k in enumerate(node._obj)})
+                position.append(node._cache['positions'][key])
+            else:
+                position.append(key)
+            node = node._obj[key]
+        return tuple(position)
+
+    def _cache_fill(self, key, value):
+        """ Caches value under key and returns it. The dirty flags are outdated by any cache
+        filled since they were set """
+        Jdic._cache_epoch += 1
+        self._cache[key] = value
+        return value
+
+    def _checksum_children(self):
+        """ Returns the sub-objects whose checksum the next checksum() will read """
+        if isinstance(self._obj, array.array):
+            return []
+        if self._checksum_entries is None:
+            keys = self._obj.keys() if isinstance(self._obj, Mapping) else range(len(self._obj))
+        else:
+            keys = [key for key in self._checksum_stale if self._has_key(key)]
+        children = []
+        for key in keys:
+            val = self._child(key)
+            if isinstance(val, Jdic):
+                children.append(val)
+        return children
+
+    @staticmethod
+    def _checksum_entry(key, val):
+        """ Returns the bytes hashed by checksum() for a single key/value entry """
+        data = "{}:{}:{}:{}".format(type(key).__name__, key, type(val).__name__,
+                                    val.checksum() if isinstance(val, Jdic) else val)
+        return data.encode('utf-8')
+
+    def _checksum_hash(self, algo='sha256'):
+        """ Hashes the entries of the object, its sub-objects being already hashed """
+        if isinstance(self._obj, array.array):
+            # The entries of compact sequences are formatted at once, as _checksum_entry() does
+            entry = 'int:{}:' + type(self._obj[0]).__name__ + ':{}'
+            hash_ = hashlib.new(algo)
+            hash_.update(b'list')
+            hash_.update(''.join(map(entry.format, range(len(self._obj)), self._obj))
+                         .encode('utf-8'))
+            self._checksum_stale = set()
+            return self._cache_fill('checksum', hash_.hexdigest())
+        if self._checksum_entries is None:
+            self._checksum_entries = {}
+            self._checksum_order = None
+            for key, val in self.enumerate():
+                self._checksum_entries[key] = self._checksum_entry(key, val)
+        entries = self._checksum_entries
+        if self._checksum_stale:
+            # Checksum entries may be shared with snapshots
+            entries = self._checksum_entries = dict(entries)
+        for key in self._checksum_stale:
+            if not self._has_key(key):
+                entries.pop(key, None)
+                self._checksum_order = None
+                continue
+            if key not in entries:
+                self._checksum_order = None
+            entries[key] = self._checksum_entry(key, self._child(key))
+        self._checksum_stale = set()
+        if self._checksum_order is None:
+            self._checksum_order = [key for key, _ in jdic_enumerate(entries, sort=True)]
+        hash_ = hashlib.new(algo)
+        hash_.update(type(self._obj).__name__.encode('utf-8'))
+        hash_.update(b''.join([entries[key] for key in self._checksum_order]))
+        return self._cache_fill('checksum', hash_.hexdigest())
+
+    def _child(self, key):
+        """ Returns the value at key, wrapping it first if it is a raw iterable """
+        # pylint: disable=protected-access
+        val = self._obj[key]
+        if isinstance(val, Jdic):
+            if val._parent is not self:
+                # Shared with a snapshot: the container is copied along with its Jdic children
+                self._own()
+                val = self._obj[key]
+        elif self._is_iterable(val):
+            self._own()
+            if self._lazy:
+                # Only the level wrapped is copied, see _serialize_raw()
+                val = jdic_create(self._serialize_raw(val, deep=False), _parent=self, _key=key,
+                                  _serialized=True)
+            else:
+                val = jdic_create(val, _parent=self, _key=key)
+            self._obj[key] = val
+        return val
+
+    @staticmethod
+    def _compact(obj):
+        """ Returns a list holding only ints (or only floats) as an array, when compact numeric
+        sequences are enabled. Other objects are returned unchanged """
+        if not settings.compact_numeric_sequences or not isinstance(obj, list) or not obj:
+            return obj
+        types = set(map(type, obj))
+        if len(types) != 1:
+            return obj
+        typecode = ARRAY_TYPECODES.get(types.pop())
+        if typecode is None:
+            return obj
+        try:
+            return array.array(typecode, obj)
+        except OverflowError:
+            return obj
+
+    def _delete(self, key):
+        """ Deletes the value at key of the current object """
+        self._own()
+        if isinstance(self._obj, array.array):
+            self._obj = self._obj.tolist()
+        subscribed = self._subscribed()
+        old = self._event_value(self._child(key)) if subscribed else None
+        del self._obj[key]
+        try:
+            # Deleting from a sequence shifts all the following indexes
+            self._flag_modified(key if isinstance(self._obj, Mapping) else None)
+        finally:
+            if subscribed:
+                self._notify(key, 'delete', old)
+
+    def _diff(self, left, right, path, stanzas, arr_mode):
+        """ Appends to stanzas the json_delta stanzas turning left into right, both being
+        values found at path. Sub-objects with the same checksum are skipped """
+        # pylint: disable=protected-access
+        if self._diff_equal(left, right):
+            return
+        if isinstance(left, Jdic) and isinstance(right, Jdic) and \
+           isinstance(left._obj, Mapping) == isinstance(right._obj, Mapping):
+            if isinstance(left._obj, Mapping):
+                self._diff_mappings(left, right, path, stanzas, arr_mode)
+            else:
+                self._diff_sequences(left, right, path, stanzas, arr_mode)
+            return
+        stanzas.append([path, self._diff_value(right)])
+
+    @staticmethod
+    def _diff_equal(left, right):
+        """ Whether two values compared by _diff() are identical """
+        # pylint: disable=protected-access
+        if isinstance(left, Jdic) and isinstance(right, Jdic):
+            return left._obj is right._obj or left.checksum() == right.checksum()
+        return type(left) is type(right) and left == right
+
+    def _diff_mappings(self, left, right, path, stanzas, arr_mode):
+        # pylint: disable=protected-access
+        for key in left._obj:
+            if key not in right._obj:
+                stanzas.append([path + [key]])
+        for key, val in right.enumerate():
+            if key in left._obj:
+                self._diff(left._child(key), val, path + [key], stanzas, arr_mode)
+            else:
+                stanzas.append([path + [key], self._diff_value(val)])
+
+    def _diff_aligned(self, left, right, start, left_end, right_end):
+        """ Returns the entries of left (between start and left_end) and of right (between
+        start and right_end) to compare, to delete and to insert, aligned by difflib """
+        # pylint: disable=protected-access,too-many-arguments
+        opcodes = difflib.SequenceMatcher(
+            None, [self._diff_key(left._child(i)) for i in range(start, left_end)],
+            [self._diff_key(right._child(i)) for i in range(start, right_end)],
+            autojunk=False).get_opcodes()
+        pairs, deleted, inserted = [], [], []
+        for tag, left_i, left_j, right_i, right_j in opcodes:
+            if tag == 'equal':
+                continue
+            # The entries replaced are compared pairwise, the extra ones deleted or inserted
+            pairs.extend(zip(range(start + left_i, start + left_j),
+                             range(start + right_i, start + right_j)))
+            deleted.extend(range(start + left_i + right_j - right_i, start + left_j))
+            inserted.extend(range(start + right_i + left_j - left_i, start + right_j))
+        return pairs, deleted, inserted
+
+    def _diff_bounds(self, left, right):
+        """ Returns the start and the ends in left and in right of the entries which differ,
+        once the identical leading and trailing entries are left out """
+        # pylint: disable=protected-access
+        left_end, right_end = len(left._obj), len(right._obj)
+        start = 0
+        while start < min(left_end, right_end) and \
+              self._diff_equal(left._child(start), right._child(start)):
+            start += 1
+        while left_end > start and right_end > start and \
+              self._diff_equal(left._child(left_end - 1), right._child(right_end - 1)):
+            left_end -= 1
+            right_end -= 1
+        return start, left_end, right_end
+
+    @staticmethod
+    def _diff_indexed(start, left_end, right_end):
+        """ Returns the entries of left and of right to compare, to delete and to insert,
+        compared index by index """
+        size = min(left_end, right_end) - start
+        pairs = [(index, index) for index in range(start, start + size)]
+        return pairs, list(range(start + size, left_end)), list(range(start + size, right_end))
+
+    def _diff_sequences(self, left, right, path, stanzas, arr_mode):
+        # pylint: disable=protected-access
+        bounds = self._diff_bounds(left, right)
+        # Entries of left compared to entries of right, deleted from left, inserted from right
+        if arr_mode == "index":
+            pairs, deleted, inserted = self._diff_indexed(*bounds)
+        elif arr_mode == "align":
+            pairs, deleted, inserted = self._diff_aligned(left, right, *bounds)
+        else:
+            raise NotImplementedError('Diff array mode "{}" not implemented'.format(arr_mode))
+        # Same order as json_delta: changes, deletions from the end, then insertions
+        for left_index, right_index in pairs:
+            self._diff(left._child(left_index), right._child(right_index), path + [left_index],
+                       stanzas, arr_mode)
+        for index in reversed(deleted):
+            stanzas.append([path + [index]])
+        # The entries inserted at the end of the list are appended
+        appended = len(right._obj)
+        for index in reversed(inserted):
+            if index != appended - 1:
+                break
+            appended = index
+        for index in inserted:
+            stanza = [path + [index], self._diff_value(right._child(index))]
+            if index < appended:
+                stanza.append('i')
+            stanzas.append(stanza)
+
+    @staticmethod
+    def _diff_key(val):
+        """ Returns a hashable key, identical for identical values compared by _diff() """
+        return val.checksum() if isinstance(val, Jdic) else (type(val), val)
+
+    @staticmethod
+    def _diff_value(val):
+        """ Returns the value a stanza holds for val """
+        return val.raw() if isinstance(val, Jdic) else val
+
+    def _event_value(self, val):
+        """ Returns a raw copy of val for the change events """
+        if isinstance(val, Jdic):
+            return val.raw()
+        if self._is_iterable(val):
+            # Raw iterables of lazy Jdics are wrapped first, as they would be when accessed
+            return jdic_create(val, serializer=self._serializer, driver=self._driver_name,
+                               lazy=self._lazy, trusted=self._trusted).raw()
+        return val
+
+    def _flag_modified(self, key=None, _origin=None, _trail=None):
+        """ Invalidates the caches, key is the only entry modified if it is known.
+        _trail links the keys leading from the current object to the modified key.
+        Returns True if the object or one of its parents has to see every modification (indexes,
+        schema). Otherwise the object is flagged as dirty: until a cache is filled, its parents
+        are already invalidated and the next modifications stop at the object """
         # pylint: disable=protected-access
+        dirty = self._dirty == Jdic._cache_epoch
+        watched = self._path_index is not None or self._search_index is not None or \
+                  bool(self._schema and not self._batch_depth)
         self._cache = {}
-        if self._parent is not None:
-            self._parent._flag_modified()
-        if self._schema:
-            self.validate(self._schema)
+        if key is None:
+            self._checksum_entries = None
+            self._checksum_stale = set()
+        elif self._checksum_entries is not None:
+            self._checksum_stale.add(key)
+        if _origin is None:
+            _origin, _trail = self, (key, None)
+        if self._path_index is not None:
+            self._path_index.drop(_trail)
+        if self._search_index is not None:
+            self._reindex(_origin, _trail)
+        if self._parent is not None and not dirty:
+            parent_key = self._parent._key_of(self)
+            watched = self._parent._flag_modified(parent_key, _origin=_origin,
+                                                  _trail=(parent_key, _trail)) or watched
+        if self._schema and not self._batch_depth:
+            _origin.validate()
+        if not watched:
+            self._dirty = Jdic._cache_epoch
+        return watched
+
+    def _get_parents(self, path):
+        """ Returns the (parent, key) couples pointed by path """
+        entry = self._indexed_parent(path)
+        if entry is not None:
+            return [entry]
+        return self._driver.get_parent(self, path)
+
+    def _has_key(self, key):
+        """ True if key (or index) exists within the current object """
+        if isinstance(self._obj, Mapping):
+            return key in self._obj
+        return isinstance(key, int) and 0 <= key < len(self._obj)
+
+    @staticmethod
+    def _in_browse_range(node_depth, depth, maxdepth):
+        """ True if browse() yields the entries of an object at node_depth """
+        if depth is not None and node_depth != depth:
+            return False
+        return maxdepth is None or maxdepth < 0 or node_depth <= maxdepth
+
+    def _index_content(self, index, key=None):
+        """ Adds the leaves and mapping keys found at key (or within the whole object) to
+        the search index """
+        # pylint: disable=protected-access
+        nodes = []
+        if key is None:
+            nodes.append(self)
+        elif self._has_key(key):
+            val = self._child(key)
+            if isinstance(val, Jdic):
+                nodes.append(val)
+            else:
+                index.add_value(val, self, key)
+            if isinstance(self._obj, Mapping):
+                index.add_key(key, self)
+        while nodes:
+            node = nodes.pop()
+            if isinstance(node._obj, Mapping):
+                for k in node._obj:
+                    index.add_key(k, node)
+            else:
+                index.add_sequence(node)
+            for k, val in node.enumerate():
+                if isinstance(val, Jdic):
+                    nodes.append(val)
+                else:
+                    index.add_value(val, node, k)
+
+    def _indexed_find(self, value, sort, depth, maxdepth):
+        """ find() through the search index """
+        # pylint: disable=protected-access
+        found = []
+        entries = self._search_index.values.get(value, {})
+        for ident, (parent, key) in list(entries.items()):
+            keys = parent._keys(self)
+            if keys is None or not parent._has_key(key) or \
+               not self._is_json_leaf(parent._obj[key]) or parent._obj[key] != value:
+                del entries[ident]
+            elif self._in_browse_range(parent._depth, depth, maxdepth):
+                found.append((self._browse_position(keys + [key], sort), parent, key))
+        found.sort(key=lambda entry: entry[0])
+        for _, parent, key in found:
+            yield MatchResult(parent=parent, parent_path=parent._path, key=key,
+                              value=parent._obj[key], depth=parent._depth, driver=self._driver)
+
+    def _indexed_find_keys(self, keys, mode, sort, depth, maxdepth):
+        """ find_keys() through the search index """
+        # pylint: disable=too-many-arguments
+        if mode not in ["any", "all"]:
+            raise NotImplementedError(mode)
+        return self._indexed_results(self._indexed_mappings(keys, mode), sort, depth, maxdepth)
+
+    def _indexed_mappings(self, keys, mode):
+        """ Returns the mappings holding any (or all) of keys through the search index, as a
+        dict of (mapping, keys leading to it) couples """
+        # pylint: disable=protected-access
+        mappings = None
+        for key in keys:
+            key = str(key)
+            found = {}
+            entries = self._search_index.keys.get(key, {})
+            for ident, mapping in list(entries.items()):
+                if mappings is not None and ident in mappings:
+                    if key in mapping._obj:
+                        found[ident] = mappings[ident]
+                    continue
+                mapping_keys = mapping._keys(self) if key in mapping._obj else None
+                if mapping_keys is None:
+                    del entries[ident]
+                elif mappings is None or mode == "any":
+                    found[ident] = (mapping, mapping_keys)
+            if mappings is None or mode == "all":
+                mappings = found
+            else:
+                mappings.update(found)
+        return mappings
+
+    def _indexed_results(self, found, sort, depth, maxdepth):
+        """ Yields the objects of found (a dict of (object, keys leading to it) couples) in
+        the order browse() would, within the depth range it would yield them """
+        # pylint: disable=protected-access
+        results = []
+        for node, node_keys in found.values():
+            if node is self:
+                if depth is None and self._in_browse_range(self._depth, None, maxdepth):
+                    results.append(((), node))
+            elif self._in_browse_range(node._depth - 1, depth, maxdepth):
+                results.append((self._browse_position(node_keys, sort), node))
+        results.sort(key=lambda result: result[0])
+        for _, node in results:
+            parent = node._parent
+            if node is self:
+                yield MatchResult(parent=parent, key=node._key, value=node,
+                                  parent_path=None if parent is None else parent._path,
+                                  path=node._path, depth=node._depth)
+            else:
+                key = parent._key_of(node)
+                yield MatchResult(parent=parent, parent_path=parent._path, key=key,
+                                  value=node, depth=parent._depth, driver=self._driver)
+
+    def _indexed_sequences(self):
+        """ Returns the sequences found within the object through the search index, as a
+        dict of (sequence, keys leading to it) couples """
+        # pylint: disable=protected-access
+        found = {}
+        entries = self._search_index.sequences
+        for ident, sequence in list(entries.items()):
+            sequence_keys = sequence._keys(self)
+            if sequence_keys is None:
+                del entries[ident]
+            else:
+                found[ident] = (sequence, sequence_keys)
+        return found
+
+    def _indexed_parent(self, path):
+        """ Returns the (parent, key) couple path resolves to through the path index, None if
+        paths are not indexed or if path may not always point to the same location """
+        # pylint: disable=protected-access
+        if self._path_index is None or not isinstance(path, str):
+            return None
+        entry = self._path_index.get(path)
+        if entry is None:
+            entry = self._driver.get_static_parent(self, path)
+            if entry is None or not isinstance(entry[0], Jdic):
+                return None
+            keys = entry[0]._keys(self)
+            if keys is None:
+                return None
+            self._path_index.add(path, keys + [entry[1]], entry)
+        return entry
 
     def _input_serialize(self, obj):
-        if self._serializer:
-            obj = self._serializer(obj)
-        elif callable(settings.serialize_custom_function):
-            # pylint: disable=not-callable
-            obj = settings.serialize_custom_function(obj)
-        if isinstance(obj, float) and settings.serialize_float_to_int and int(obj) == obj:
-            return int(obj)
-        if self._is_json_leaf(obj):
+        if not self._trusted:
+            if self._serializer:
+                obj = self._serializer(obj)
+            elif callable(settings.serialize_custom_function):
+                # pylint: disable=not-callable
+                obj = settings.serialize_custom_function(obj)
+        kind = _json_kind(obj)
+        if kind == _LEAF:
+            if isinstance(obj, float) and settings.serialize_float_to_int and int(obj) == obj:
+                return int(obj)
             return obj
-        if isinstance(obj, Mapping):
-            return dict(obj)
-        elif isinstance(obj, Sequence):
-            return list(obj)
-        return str(obj)
+        if kind == _OTHER:
+            return str(obj)
+        return obj # Iterables are copied by the Jdic wrapping them, or shared when lazy
 
-    def _is_iterable(self, obj):
-        if self._is_json_leaf(obj):
-            return False
-        for itype in JSON_ITERABLES:
-            if isinstance(obj, itype):
-                return True
-        return False
+    @staticmethod
+    def _is_iterable(obj):
+        """ True for Mappings and Sequences other than str """
+        return _json_kind(obj) in (_MAPPING, _SEQUENCE)
 
     @staticmethod
     def _is_json_leaf(obj):
         """ True for int, float, str, bool, None """
-        for ltype in JSON_LEAVES:
-            if isinstance(obj, ltype):
-                return True
-        return False
+        return _json_kind(obj) == _LEAF
 
     @staticmethod
     def _is_limit_reached(number, limit):
@@ -237,12 +765,117 @@ class Jdic(object):
         if limit >= number:
             return True
 
+    def _iter_json(self, encoder, encode, indent, newline):
+        """ Yields the pieces of the JSON dump, newline being None for compact dumps """
+        # pylint: disable=protected-access
+        mapping = isinstance(self._obj, Mapping)
+        values = self._obj.values() if mapping else self._obj
+        if not values:
+            yield '{}' if mapping else '[]'
+            return
+        if isinstance(values, array.array):
+            values = values.tolist()
+            flat = True
+        else:
+            flat = all(map(self._is_json_leaf, values))
+        if flat and newline is None:
+            # Compact flat objects go through the C encoder
+            yield encoder.encode(self._obj if mapping else values)
+            return
+        inner = None if newline is None else newline + indent
+        separator = ', ' if inner is None else ',' + inner
+        opening = ('{' if mapping else '[') + (inner or '')
+        closing = (newline or '') + ('}' if mapping else ']')
+        if flat:
+            if mapping:
+                yield opening + separator.join([
+                    self._json_key(key, encode) + ': ' + encode(self._obj[key])
+                    for key in (sorted(self._obj) if encoder.sort_keys else self._obj)
+                ]) + closing
+            else:
+                yield opening + separator.join([encode(val) for val in values]) + closing
+            return
+        yield opening
+        first = True
+        for key, val in self.enumerate(sort=encoder.sort_keys):
+            if not first:
+                yield separator
+            first = False
+            if mapping:
+                yield self._json_key(key, encode) + ': '
+            if isinstance(val, Jdic):
+                yield from val._iter_json(encoder, encode, indent, inner)
+            else:
+                yield encode(val)
+        yield closing
+
     def _jdic_reload(self, obj):
         # pylint: disable=protected-access
         if isinstance(obj, Jdic):
             obj = obj._obj
+        old = self.raw() if self._subscribed() else None
         self._obj = self._serialize_to_jdic(obj, parent=self)
-        self._flag_modified()
+        self._shared = False
+        try:
+            self._flag_modified()
+        finally:
+            if old is not None:
+                self._notify(None, 'set', old, self.raw())
+
+    @staticmethod
+    def _json_key(key, encode):
+        """ Encodes a key of a mapping as the json module does """
+        return encode(key if isinstance(key, str) else json.dumps(key))
+
+    @staticmethod
+    def _json_leaf_encoder(encoder):
+        """ Returns a function encoding leaves faster than encoder.encode() """
+        string = json.encoder.encode_basestring_ascii if encoder.ensure_ascii \
+                 else json.encoder.encode_basestring
+        constants = {None: 'null', True: 'true', False: 'false'}
+
+        def encode(val):
+            if isinstance(val, str):
+                return string(val)
+            if val is None or isinstance(val, bool):
+                return constants[val]
+            if isinstance(val, int):
+                return int.__repr__(val)
+            if isinstance(val, float) and math.isfinite(val):
+                return float.__repr__(val)
+            return encoder.encode(val) # NaN, infinities and any other type
+        return encode
+
+    def _keys(self, root=None):
+        """ Returns the list of keys leading from root (or the top) to the current object,
+        None if the object is not attached to root anymore """
+        # pylint: disable=protected-access
+        keys = []
+        node = self
+        while node is not root and node._parent is not None:
+            key = node._parent._key_of(node)
+            if key is None:
+                return None
+            keys.append(key)
+            node = node._parent
+        if root is not None and node is not root:
+            return None
+        keys.reverse()
+        return keys
+
+    def _key_of(self, child):
+        """ Returns the key of a direct child Jdic, None if it is not attached anymore """
+        # pylint: disable=protected-access
+        key = child._key
+        if isinstance(self._obj, Mapping):
+            return key if self._obj.get(key) is child else None
+        if isinstance(key, int) and 0 <= key < len(self._obj) and self._obj[key] is child:
+            return key
+        for index, val in enumerate(self._obj):
+            if val is child:
+                child._key = index # Shifted by a deletion or an insertion
+                return index
+        return None
 
     @staticmethod
     def _keys_in(obj, keys, mode):
@@ -262,93 +895,395 @@ class Jdic(object):
         raise NotImplementedError(mode)
 
     def _match(self, obj, query):
+        if isinstance(obj, array.array):
+            obj = obj.tolist()
         return self._driver.match(obj, query)
 
-    def _merge(self, obj, with_obj, arr_mode="replace"):
+    @staticmethod
+    def _may_match(obj, plan):
+        """ False if obj cannot match the query planned by the driver """
         # pylint: disable=protected-access
-        if isinstance(obj, Jdic):
-            obj = obj._obj
+        if not isinstance(obj, Jdic):
+            return plan.strings and isinstance(obj, str)
+        if isinstance(obj._obj, Mapping):
+            for key in plan.required_keys:
+                if key not in obj._obj:
+                    return False
+        elif not plan.sequences:
+            for val in obj._obj:
+                if val is None or not isinstance(val, (str, int, float)):
+                    return True
+            return False
+        return True
+
+    def _merge(self, with_obj, arr_mode="replace"):
+        """ Merges with_obj into the current object, in place. Returns False, the object being
+        left untouched, when with_obj is to replace it instead """
+        # pylint: disable=protected-access,unidiomatic-typecheck
         if isinstance(with_obj, Jdic):
             with_obj = with_obj._obj
-        if not self._is_iterable(obj) or not self._is_iterable(with_obj):
-            raise TypeError('Cannot merge {} with {}'.format(type(obj), type(with_obj)))
-        unique_t = self._unique_type(obj, with_obj)
-        if not unique_t:
-            return with_obj
-        if unique_t and isinstance(obj, Mapping):
-            obj = self._merge_dicts(obj, with_obj, arr_mode)
-        else:
-            obj = self._merge_arrays(obj, with_obj, arr_mode)
-        return obj
+        if isinstance(with_obj, array.array):
+            with_obj = with_obj.tolist()
+        if isinstance(self._obj, Mapping):
+            if type(with_obj) is not dict:
+                return False
+            self._merge_dicts(with_obj, arr_mode)
+            return True
+        if type(with_obj) is not list:
+            return False
+        return self._merge_arrays(with_obj, arr_mode)
 
-    def _merge_arrays(self, arr, with_arr, mode="replace"):
+    def _merge_arrays(self, with_arr, mode="replace"):
         if mode == "replace":
-            return with_arr
+            return False
         if mode == "append":
-            return arr + with_arr
+            for val in with_arr:
+                self._set(len(self._obj), self._input_serialize(val), insert=True)
+            return True
         if mode == "new":
+            # The values are looked up in a set rather than compared with each value
+            keys = set(self._merge_key(self._child(index)) for index in range(len(self._obj)))
             for val in with_arr:
-                if val not in arr:
-                    arr.append(val)
-            return arr
+                val = self._input_serialize(val)
+                key = self._merge_key(val)
+                if key not in keys:
+                    keys.add(key)
+                    self._set(len(self._obj), val, insert=True)
+            return True
         if mode == "merge":
-            arr_l = len(arr)
             for index, val in enumerate(with_arr):
-                if index >= arr_l:
-                    arr.append(val)
-                else:
-                    if self._is_iterable(arr[index]) and self._is_iterable(with_arr[index]):
-                        arr[index] = self._merge(arr[index], with_arr[index], mode)
-                    else:
-                        arr[index] = with_arr[index]
-            return arr
+                self._merge_value(index, val, mode)
+            return True
         raise NotImplementedError('Merge array mode "{}" not implemented'.format(mode))
 
-    def _merge_dicts(self, dic, with_dic, arr_mode):
-        for k in with_dic:
-            if k not in dic:
-                dic[k] = with_dic[k]
-            else:
-                if self._is_iterable(dic[k]) and self._is_iterable(with_dic[k]):
-                    dic[k] = self._merge(dic[k], with_dic[k], arr_mode)
+    def _merge_dicts(self, with_dic, arr_mode):
+        for key, val in with_dic.items():
+            self._merge_value(str(key), val, arr_mode)
+
+    def _merge_key(self, val):
+        """ Returns a hashable key, equal for the values which are equal: leaves are compared
+        as they are, iterables by checksum as __eq__() does """
+        if isinstance(val, Jdic):
+            return True, val.checksum()
+        if self._is_iterable(val):
+            return True, jdic_create(val).checksum()
+        return False, val
+
+    def _merge_value(self, key, val, arr_mode):
+        """ Merges val into the value at key of the current object, or sets it there. Values
+        left unchanged are not set again """
+        # pylint: disable=protected-access
+        val = self._input_serialize(val)
+        if not self._has_key(key):
+            self._set(key, val, insert=not isinstance(self._obj, Mapping))
+            return
+        current = self._child(key)
+        if isinstance(current, Jdic):
+            if self._is_iterable(val) and current._merge(val, arr_mode):
+                return
+        elif type(current) is type(val) and current == val:
+            return
+        self._set(key, val)
+
+    def _notify(self, key, op, old=None, new=None):
+        """ Sends a change event to the subscribers of the current object and of its parents.
+        key is the key of the value changed within the object, None if it is the object """
+        # pylint: disable=protected-access
+        keys = [] if key is None else [key]
+        node = self
+        while node is not None:
+            if node._subscribers:
+                event = ChangeEvent(keys[::-1], op, old, new)
+                for callback in list(node._subscribers):
+                    callback(event)
+            if node._parent is None:
+                break
+            key = node._parent._key_of(node)
+            if key is None:
+                break # The object is not attached to its parent anymore
+            keys.append(key)
+            node = node._parent
+
+    def _notify_container(self, before):
+        """ Sends the change events turning the container before into the current one,
+        after a method of the container modified it """
+        after = self._obj
+        if isinstance(after, Mapping):
+            for key, val in before.items():
+                if key not in after:
+                    self._notify(key, 'delete', self._event_value(val))
+            for key, val in after.items():
+                if key not in before:
+                    self._notify(key, 'add', None, self._event_value(self._child(key)))
+                elif val is not before[key]:
+                    self._notify(key, 'set', self._event_value(before[key]),
+                                 self._event_value(self._child(key)))
+            return
+        # Only the entries between the common leading and trailing ones changed
+        start, end, end_before = 0, len(after), len(before)
+        while start < min(end, end_before) and after[start] is before[start]:
+            start += 1
+        while end > start and end_before > start and after[end - 1] is before[end_before - 1]:
+            end -= 1
+            end_before -= 1
+        common = min(end - start, end_before - start)
+        for index in range(start, start + common):
+            self._notify(index, 'set', self._event_value(before[index]),
+                         self._event_value(self._child(index)))
+        for index in range(end_before - 1, start + common - 1, -1):
+            self._notify(index, 'delete', self._event_value(before[index]))
+        for index in range(start + common, end):
+            self._notify(index, 'insert', None, self._event_value(self._child(index)))
+
+    def _own(self):
+        """ Copies the containers shared with snapshots from the root down to the current
+        object, which can then be modified without altering the snapshots """
+        # pylint: disable=protected-access
+        node = self
+        while node is not None and not node._shared:
+            node = node._parent
+        if node is None:
+            return
+        nodes = []
+        node = self
+        while node is not None:
+            nodes.append(node)
+            node = node._parent
+        for node in reversed(nodes):
+            if node._shared:
+                node._unshare()
+
+    def _serialize_raw(self, iterable, deep=True):
+        """ Returns a serialized copy of iterable made of plain dicts and lists, for lazy
+        objects. Without deep, the nested iterables are not copied. Iterative, as lazy
+        documents may be deeper than the recursion limit """
+        # Without serializer to call, the values of the usual types are taken as they are
+        plain = self._trusted or not (self._serializer or
+                                      callable(settings.serialize_custom_function))
+        res = {} if _json_kind(iterable) == _MAPPING else []
+        nodes = [(iterable, res)]
+        while nodes:
+            source, target = nodes.pop()
+            mapping = isinstance(target, dict)
+            for key, val in source.items() if mapping else enumerate(source):
+                kind = _TYPE_KINDS.get(type(val), _OTHER)
+                if not plain or kind == _OTHER or isinstance(val, float):
+                    val = self._input_serialize(val)
+                    kind = _json_kind(val)
+                if kind == _LEAF:
+                    pass
+                elif isinstance(val, Jdic):
+                    val = val.raw()
+                elif deep and kind != _OTHER:
+                    nodes.append((val, {} if kind == _MAPPING else []))
+                    val = nodes[-1][1]
+                if mapping:
+                    target[str(key)] = val
                 else:
-                    dic[k] = with_dic[k]
-        return dic
+                    target.append(val)
+        return res
 
     def _serialize_to_jdic(self, iterable, parent=None):
-        if isinstance(iterable, Mapping):
-            iterable = dict(iterable)
-        elif isinstance(iterable, Sequence):
-            iterable = list(iterable)
-        res = type(iterable)()
-        for key, val in jdic_enumerate(iterable):
-            if isinstance(res, dict):
+        if self._lazy:
+            # The caller keeps its nested objects, which may be modified afterwards
+            return self._compact(self._serialize_raw(iterable))
+        mapping = _json_kind(iterable) == _MAPPING
+        res = {} if mapping else []
+        for key, val in iterable.items() if mapping else enumerate(iterable):
+            if mapping:
                 key = str(key)
             val = self._input_serialize(val)
             if self._is_iterable(val):
                 val = jdic_create(val, _parent=parent, _key=key)
-            if isinstance(res, dict):
+            if mapping:
                 res[key] = val
             else:
                 res.append(val)
-        return res
+        return self._compact(res)
 
-    @staticmethod
-    def _unique_type(*args):
-        result = None
-        for val in args:
-            type_val = type(val)
-            if not result:
-                result = type_val
-            elif result != type_val:
-                return None
-        return result
+    def _patch(self, stanza):
+        """ Applies a json_delta stanza to the current object. Returns the stanza undoing it """
+        # pylint: disable=protected-access
+        path = stanza[0]
+        if not path:
+            if not self._is_iterable(stanza[1]):
+                raise ValueError('Cannot patch object to non iterable "{}"'.format(
+                    type(stanza[1])))
+            if isinstance(stanza[1], Mapping) != isinstance(self._obj, Mapping):
+                raise TypeError('Cannot patch "{}" to "{}" in place'.format(
+                    type(self._obj), type(stanza[1])))
+            undo = [path, self.new()]
+            self._jdic_reload(stanza[1])
+            return undo
+        node = self
+        for key in path[:-1]:
+            node = node._child(key)
+        key = path[-1]
+        mapping = isinstance(node._obj, Mapping)
+        if len(stanza) == 1:
+            undo = [path, node._obj[key]] if mapping else [path, node._obj[key], 'i']
+            node._delete(key)
+        elif not mapping and (len(stanza) == 3 or key == len(node._obj)):
+            undo = [path]
+            node._set(key, stanza[1], insert=True)
+        else:
+            undo = [path, node._obj[key]] if not mapping or key in node._obj else [path]
+            node._set(key, stanza[1])
+        return undo
+
+    def _reindex(self, origin=None, trail=None):
+        """ Adds what changed at the end of trail, within origin, to the search index. The
+        index is rebuilt when origin is not given, or when it holds too many stale entries """
+        # pylint: disable=protected-access
+        index = self._search_index
+        if origin is None or index.needs_rebuild():
+            index.clear()
+            self._index_content(index)
+            index.built = index.added
+            return
+        key, trail = trail
+        while trail is not None:
+            if key is None:
+                return # origin is not attached to the current object anymore
+            key, trail = trail
+        origin._index_content(index, key)
+
+    def _root(self):
+        """ Returns the root Jdic object of the current hierarchy """
+        # pylint: disable=protected-access
+        root = self
+        while root._parent is not None:
+            root = root._parent
+        return root
+
+    def _set(self, key, value, insert=False):
+        """ Sets value at key of the current object, or inserts it at index key of a sequence.
+        Returns the value as stored """
+        self._own()
+        if self._is_iterable(value):
+            value = jdic_create(value, _parent=self, _key=key)
+        if isinstance(self._obj, array.array) and (not isinstance(key, int) or \
+           ARRAY_TYPECODES.get(type(value)) != self._obj.typecode):
+            self._obj = self._obj.tolist()
+        subscribed = self._subscribed()
+        if subscribed:
+            op = 'insert' if insert else 'add' if isinstance(self._obj, Mapping) and \
+                 key not in self._obj else 'set'
+            old = self._event_value(self._child(key)) if op == 'set' else None
+        try:
+            self._store(key, value, insert)
+        except OverflowError:
+            # An int out of the range of the array
+            self._obj = self._obj.tolist()
+            self._store(key, value, insert)
+        try:
+            # Inserting in a sequence shifts all the following indexes
+            self._flag_modified(None if insert else key)
+        finally:
+            if subscribed:
+                self._notify(key, op, old, self._event_value(value))
+        return value
+
+    def _share(self, parent=None, key=None):
+        """ Returns a Jdic sharing the container of the current object, as a root object or
+        as the child at key of parent. Both are flagged so that the first one to be modified
+        copies the container first """
+        # pylint: disable=protected-access
+        clone = object.__new__(type(self))
+        clone.__dict__.update(self.__dict__)
+        clone._parent = parent
+        clone._key = key
+        if parent is None:
+            clone._path = self._driver.get_new_path()
+            clone._depth = 0
+        else:
+            clone._path = self._driver.add_to_path(parent._path, key)
+            clone._depth = parent._depth + 1
+        clone._batch_depth = 0
+        # The caches are copied: a dirty object does not replace its cache again before it is
+        # filled, see _flag_modified(). Only deepness varies with depth
+        clone._cache = {k: v for k, v in self._cache.items()
+                        if k != 'deepness' or clone._depth == self._depth}
+        clone._checksum_stale = set(self._checksum_stale)
+        clone._path_index = None
+        clone._search_index = None
+        clone._subscribers = None
+        clone._dirty = None
+        clone._shared = self._shared = True
+        return clone
+
+    def _store(self, key, value, insert=False):
+        """ Sets value at key of the container, or inserts it at index key of a sequence """
+        if insert:
+            self._obj.insert(key, value)
+        else:
+            self._obj[key] = value
+
+    def _subscribed(self):
+        """ Returns True if the current object or one of its parents has subscribers """
+        # pylint: disable=protected-access
+        node = self
+        while node is not None and not node._subscribers:
+            node = node._parent
+        return node is not None
+
+    def _unshare(self):
+        """ Replaces the shared container by a copy. The Jdic children it holds are shared in
+        turn, so that each side keeps children whose parent is its own object """
+        # pylint: disable=protected-access
+        obj = self._obj
+        if isinstance(obj, Mapping):
+            own = dict(obj)
+            items = obj.items()
+        else:
+            own = obj[:]
+            items = enumerate(obj)
+        for key, val in items:
+            if not isinstance(val, Jdic):
+                continue
+            if val._parent is self:
+                obj[key] = val._share()
+            else:
+                own[key] = val._share(self, key)
+        self._obj = own
+        self._shared = False
 
     ##
     # PUBLIC FUNCTIONS
     ##
 
-    def browse(self, sort=False, depth=None, maxdepth=None, _start=True):
+    @contextmanager
+    def batch(self, rollback=True):
+        """
+        Suspends the schema validation of the whole Jdic hierarchy within a `with` block.
+        The object is validated once when the block exits.
+
+        Arguments:
+          - rollback: bool. If True the object is restored to its state prior to the block
+                      when the block raises or when the final validation fails.
+        """
+        # pylint: disable=protected-access
+        root = self._root()
+        backup = root.new() if rollback and not root._batch_depth else None
+        root._batch_depth += 1
+        try:
+            try:
+                yield self
+            finally:
+                root._batch_depth -= 1
+                Jdic._cache_epoch += 1 # Modifications are validated again from now on
+            if root._schema and not root._batch_depth:
+                root.validate()
+        except Exception:
+            if backup is not None:
+                root._batch_depth += 1
+                try:
+                    root._jdic_reload(backup)
+                finally:
+                    root._batch_depth -= 1
+            raise
+
+    def browse(self, sort=False, depth=None, maxdepth=None):
         """
         Iterates on each JSON entry in a recursive fashion
 
@@ -358,39 +1293,49 @@ class Jdic(object):
           - maxdepth: an integer between 0 and +inf. Results won't be yielded past this depth.
         """
         # pylint: disable=protected-access
-        if maxdepth is not None and maxdepth >= 0 and self._depth > maxdepth:
+        limit = depth
+        if maxdepth is not None and maxdepth >= 0 and (limit is None or maxdepth < limit):
+            limit = maxdepth
+        if limit is not None and self._depth > limit:
             return
-        if depth is not None and self._depth > depth:
-            return
-        parent_path = None if self._parent is None else self._parent._path
-        if depth is None and _start:
+        if depth is None:
+            parent_path = None if self._parent is None else self._parent._path
             yield MatchResult(parent=self._parent, parent_path=parent_path, key=self._key,
                               value=self, path=self._path, depth=self._depth)
-        for key, val in jdic_enumerate(self._obj, sort=sort):
-            path = self._driver.add_to_path(self._path, key)
-            if depth is None or depth == self._depth:
-                yield MatchResult(parent=self, parent_path=self._path, key=key,
-                                  value=val, path=path, depth=self._depth)
-            if isinstance(val, Jdic):
-                yield from val.browse(sort=sort, depth=depth, maxdepth=maxdepth, _start=False)
+        # The objects being browsed and their pending entries, deepest last
+        nodes = [self]
+        entries = [self.enumerate(sort=sort)]
+        while entries:
+            node = nodes[-1]
+            for key, val in entries[-1]:
+                if depth is None or depth == node._depth:
+                    yield MatchResult(parent=node, parent_path=node._path, key=key,
+                                      value=val, depth=node._depth, driver=self._driver)
+                if isinstance(val, Jdic) and (limit is None or val._depth <= limit):
+                    nodes.append(val)
+                    entries.append(val.enumerate(sort=sort))
+                    break
+            else:
+                nodes.pop()
+                entries.pop()
 
     def checksum(self, algo='sha256'):
         """ Returns an ASCII hexadecimal checksum representing the state of the object """
+        # pylint: disable=protected-access
         if 'checksum' in self._cache:
             return self._cache['checksum']
-        hash_ = hashlib.new(algo)
-        hash_.update(type(self._obj).__name__.encode('utf-8'))
-        for key, val in jdic_enumerate(self._obj, sort=True):
-            if isinstance(val, Jdic):
-                data = "{}:{}:{}:{}".format(type(key).__name__, key,
-                                            type(val).__name__, val.checksum())
-            else:
-                data = "{}:{}:{}:{}".format(type(key).__name__, key,
-                                            type(val).__name__, val)
-            hash_.update(data.encode('utf-8'))
-        checksum = hash_.hexdigest()
-        self._cache['checksum'] = checksum
-        return checksum
+        # The sub-objects to hash are hashed first, children before their parents
+        nodes = [self]
+        pending = []
+        while nodes:
+            node = nodes.pop()
+            for child in node._checksum_children():
+                if 'checksum' not in child._cache:
+                    pending.append(child)
+                    nodes.append(child)
+        for node in reversed(pending):
+            node._checksum_hash()
+        return self._checksum_hash(algo)
 
     def deepness(self):
         """ Returns an integer representing how deep the Jdic object is """
@@ -402,35 +1347,54 @@ class Jdic(object):
                 depth = val.value.depth()
                 if depth > deepness:
                     deepness = depth
-        self._cache['deepness'] = deepness
-        return deepness
+        return self._cache_fill('deepness', deepness)
 
     def depth(self):
         """ Returns an integer representing the depth of the current Jdic object """
         return self._depth
 
-    def diff(self, obj):
-        """ Returns a delta between this object and obj """
-        if isinstance(obj, Jdic):
-            obj = obj.raw()
-        return json_delta.diff(self.raw(), obj, verbose=False)
+    def diff(self, obj, arr_mode="align"):
+        """ Returns a delta between this object and obj, in the json_delta format """
+        if not isinstance(obj, Jdic) and self._is_iterable(obj):
+            obj = jdic_create(obj, serializer=self._serializer, driver=self._driver_name,
+                              lazy=self._lazy, trusted=self._trusted)
+        stanzas = []
+        self._diff(self, obj, [], stanzas, arr_mode)
+        # Deeper stanzas first, so that the indexes they use are not shifted yet
+        stanzas.sort(key=lambda stanza: -len(stanza[0]))
+        return stanzas
+
+    def dump(self, fp, sort_keys=False, indent=0, ensure_ascii=False, chunk_size=65536):
+        """ Writes the object in JSON format to the fp file object, chunk by chunk """
+        # pylint: disable=too-many-arguments
+        for chunk in self.iter_json(sort_keys=sort_keys, indent=indent,
+                                    ensure_ascii=ensure_ascii, chunk_size=chunk_size):
+            fp.write(chunk)
 
     def enumerate(self, sort=False):
         """ Yields a key, value pair with both Jdic Mappings and Sequences """
-        yield from jdic_enumerate(self._obj, sort=sort)
+        # pylint: disable=protected-access
+        for key, val in jdic_enumerate(self._obj, sort=sort):
+            if val._parent is not self if isinstance(val, Jdic) else self._is_iterable(val):
+                val = self._child(key)
+            yield (key, val)
 
     def find(self, value, limit=None, sort=False, depth=None, maxdepth=None):
         """ Finds a value within the Jdic object, the search is recursive """
         # pylint: disable=too-many-arguments
         if limit == 0:
             return
+        if self._search_index is not None and self._is_json_leaf(value):
+            results = self._indexed_find(value, sort, depth, maxdepth)
+        else:
+            results = (res for res in self.browse(sort=sort, depth=depth, maxdepth=maxdepth)
+                       if res.value == value)
         num = 0
-        for res in self.browse(sort=sort, depth=depth, maxdepth=maxdepth):
-            if res.value == value:
-                yield res
-                num += 1
-                if self._is_limit_reached(num, limit):
-                    return
+        for res in results:
+            yield res
+            num += 1
+            if self._is_limit_reached(num, limit):
+                return
 
     def find_keys(self, keys, mode="any", sort=False,
                   limit=None, depth=None, maxdepth=None):
@@ -440,32 +1404,95 @@ class Jdic(object):
             return
         if not isinstance(keys, list):
             keys = [keys]
+        if self._search_index is not None and keys and not any(
+                self._driver.is_root_path(key) or self._driver.is_a_path(key) for key in keys):
+            results = self._indexed_find_keys(keys, mode, sort, depth, maxdepth)
+        else:
+            results = (match for match in self.browse(sort=sort, depth=depth, maxdepth=maxdepth)
+                       if isinstance(match.value, Jdic) and self._keys_in(match.value, keys, mode))
         num = 0
-        for match in self.browse(sort=sort, depth=depth, maxdepth=maxdepth):
-            if isinstance(match.value, Jdic):
-                if self._keys_in(match.value, keys, mode):
-                    yield match
-                    num += 1
-                    if limit is not None and limit == num:
-                        return
+        for match in results:
+            yield match
+            num += 1
+            if limit is not None and limit == num:
+                return
 
     def find_match(self, query, sort=False, limit=None, depth=None, maxdepth=None):
         """ Find inner data which match the provided query """
-        # pylint: disable=too-many-arguments
-        if limit == 0 or not maxdepth == 0:
+        # pylint: disable=protected-access,too-many-arguments
+        if limit == 0:
             return
+        query = self._driver.compile_query(query)
+        plan = self._driver.plan_query(query)
+        if plan is None:
+            results = self.browse(sort=sort, depth=depth, maxdepth=maxdepth)
+        else:
+            if self._search_index is not None and plan.required_keys and not plan.strings:
+                found = self._indexed_sequences()
+                found.update(self._indexed_mappings(list(plan.required_keys), "all"))
+                results = self._indexed_results(found, sort, depth, maxdepth)
+            else:
+                results = self.browse(sort=sort, depth=depth, maxdepth=maxdepth)
+            results = (res for res in results if self._may_match(res.value, plan))
         num = 0
-        for res in self.browse(sort=sort, depth=depth, maxdepth=maxdepth):
-            if self._match(res.value, query):
+        for res in results:
+            if self._match(res.value._obj if isinstance(res.value, Jdic) else res.value, query):
                 yield res
                 num += 1
                 if self._is_limit_reached(num, limit):
                     break
 
+    def index_paths(self, enable=True):
+        """ Enables (or disables) the index of the JSON paths looked up within the object """
+        if not enable:
+            self._path_index = None
+        elif self._path_index is None:
+            self._path_index = PathIndex()
+            Jdic._cache_epoch += 1 # Dirty objects must report their modifications again
+        return self
+
+    def index_search(self, enable=True):
+        """ Enables (or disables) the value and key indexes used by find() and find_keys() """
+        if not enable:
+            self._search_index = None
+        elif self._search_index is None:
+            self._search_index = SearchIndex()
+            Jdic._cache_epoch += 1 # Dirty objects must report their modifications again
+            self._reindex()
+        return self
+
+    def iter_json(self, sort_keys=False, indent=0, ensure_ascii=False, chunk_size=65536):
+        """
+        Yields the object in JSON format as strings of about chunk_size characters,
+        which once joined are identical to json(). No raw copy of the object is made.
+        """
+        cache_key = ('json', sort_keys, indent, ensure_ascii)
+        if cache_key in self._cache:
+            cached = self._cache[cache_key]
+            for start in range(0, len(cached), chunk_size):
+                yield cached[start:start + chunk_size]
+            return
+        encoder = json.JSONEncoder(sort_keys=sort_keys, indent=indent, ensure_ascii=ensure_ascii)
+        if indent is not None and not isinstance(indent, str):
+            indent = ' ' * indent
+        buffer, size = [], 0
+        encode = self._json_leaf_encoder(encoder)
+        for piece in self._iter_json(encoder, encode, indent, None if indent is None else '\n'):
+            buffer.append(piece)
+            size += len(piece)
+            if size >= chunk_size:
+                yield ''.join(buffer)
+                buffer, size = [], 0
+        if buffer:
+            yield ''.join(buffer)
+
     def json(self, sort_keys=False, indent=0, ensure_ascii=False):
         """ Returns a string of the object in JSON format """
-        return json.dumps(self.raw(), sort_keys=sort_keys,
-                          indent=indent, ensure_ascii=ensure_ascii)
+        cache_key = ('json', sort_keys, indent, ensure_ascii)
+        if cache_key not in self._cache:
+            self._cache_fill(cache_key, json.dumps(self.raw(_cache=True), sort_keys=sort_keys,
+                                                   indent=indent, ensure_ascii=ensure_ascii))
+        return self._cache[cache_key]
 
     def leaves(self, sort=False, depth=None, maxdepth=None):
         """ Iterates recursively, raises leaves of the object only """
@@ -480,8 +1507,7 @@ class Jdic(object):
         nb_leaves = 0
         for _ in self.leaves():
             nb_leaves += 1
-        self._cache['nb_leaves'] = nb_leaves
-        return nb_leaves
+        return self._cache_fill('nb_leaves', nb_leaves)
 
     def match(self, query):
         """ Returns True if the object matches against query, False otherwise """
@@ -492,21 +1518,27 @@ class Jdic(object):
         if not isinstance(objs, list):
             objs = [objs]
         for with_obj in objs:
-            if (isinstance(with_obj, Mapping) and not isinstance(self._obj, Mapping)) or\
-               (not isinstance(with_obj, Mapping) and isinstance(self._obj, Mapping)):
+            if not self._is_iterable(with_obj) or \
+               isinstance(with_obj, Mapping) != isinstance(self._obj, Mapping):
                 raise TypeError('Cannot merge "{}" with "{}"'.format(
                     type(self._obj),
                     type(with_obj)))
-            result = self._merge(self._obj, with_obj, arr_mode)
-            self._jdic_reload(result)
+        # Only the values merged are set, the object is validated once all are merged
+        with self.batch(rollback=False):
+            for with_obj in objs:
+                if not self._merge(with_obj, arr_mode):
+                    self._jdic_reload(with_obj)
         return self
 
     def new(self, _obj=None):
-        """ Returns a copy of the current object """
+        """
+        Returns a copy of the current object. The copy shares its content with the object
+        until either of them is modified: only the modified nodes and their parents are copied.
+        """
         if _obj is None:
-            _obj = self._obj
-        return jdic_create(_obj, serializer=self._serializer,
-                           driver=self._driver_name, schema=self._schema)
+            return self._share()
+        return jdic_create(_obj, serializer=self._serializer, driver=self._driver_name,
+                           schema=self._schema, lazy=self._lazy, trusted=self._trusted)
 
     def parent(self, generation=1):
         """ Returns the Jdic object parent of this object """
@@ -519,42 +1551,117 @@ class Jdic(object):
             generation = generation - 1
         return res
 
-    def patch(self, diff):
-        """ Takes a delta (from diff()) and applies it to update the object """
+    def patch(self, diff, inplace=False):
+        """
+        Takes a delta (from diff()) and applies it to update the object. Returns the updated
+        copy of the object, or the object itself when it is patched in place.
+        """
+        # pylint: disable=protected-access
         if not diff:
-            return
-        res = json_delta.patch(self.raw(), diff)
-        if self._is_iterable(res):
-            return self.new(res)
-        return res
+            return self if inplace else None
+        if not inplace and not diff[-1][0]:
+            # The whole object is replaced, by the last stanza
+            return self.new(diff[-1][1]) if self._is_iterable(diff[-1][1]) else diff[-1][1]
+        target = self if inplace else self.new()
+        undo = []
+        try:
+            # Stanzas are undone on failure, which is cheaper than batch() snapshots
+            with target.batch(rollback=False):
+                for stanza in diff:
+                    undo.append(target._patch(stanza))
+        except Exception:
+            if inplace:
+                with target.batch(rollback=False):
+                    for stanza in reversed(undo):
+                        target._patch(stanza)
+            raise
+        return target
 
     def path(self):
         """ Return the path of the current Jdic object within its hierarchy """
         return self._path
 
+    def path_index_info(self):
+        """ Returns the size of the path index, None if paths are not indexed """
+        if self._path_index is None:
+            return None
+        return self._path_index.info()
+
     def raw(self, _obj=None, _cache=False):
-        """ Returns a copy of the current object in basic Python types """
+        """
+        Returns a copy of the current object in basic Python types. With _cache, a snapshot
+        kept until the next change is returned instead: it shares the cached snapshots of
+        the sub-objects and must not be modified.
+        """
         if _cache and 'raw' in self._cache:
             return self._cache['raw']
         obj = _obj if _obj else self._obj
-        res = type(obj)()
-        for key, val in jdic_enumerate(obj):
-            if isinstance(val, Jdic):
-                val = val.raw(_cache=_cache)
-            if isinstance(res, dict):
-                res[key] = val
-            else:
-                res.append(val)
-        self._cache['raw'] = res
+        if isinstance(obj, array.array):
+            res = obj.tolist()
+        else:
+            res = type(obj)()
+            for key, val in jdic_enumerate(obj) if _obj else self.enumerate():
+                if isinstance(val, Jdic):
+                    val = val.raw(_cache=_cache)
+                if isinstance(res, dict):
+                    res[key] = val
+                else:
+                    res.append(val)
+        if _cache and not _obj:
+            self._cache_fill('raw', res)
         return res
 
+    def search_index_info(self):
+        """ Returns the size of the search index, None if it is not enabled """
+        if self._search_index is None:
+            return None
+        return self._search_index.info()
+
+    def subscribe(self, callback):
+        """
+        Calls callback with a ChangeEvent for each change made within the object, and returns
+        callback. The events of a batch are sent as it goes, including those of a rollback.
+        """
+        if self._subscribers is None:
+            self._subscribers = []
+        self._subscribers.append(callback)
+        return callback
+
     def validate(self, schema=None):
-        """ Validates the current Jdic object against a JSON schema """
-        if schema is not None:
-            return jsonschema.validate(self.raw(), schema)
-        elif schema is None and self._schema is not None:
-            return jsonschema.validate(self.raw(), self._schema)
-        raise ValueError('The current object is not supervised by any schema')
+        """
+        Validates the current Jdic object against a JSON schema. Without schema, an object
+        which is not supervised itself is validated against the part of the schema of its
+        root which applies at its path
+        """
+        # pylint: disable=protected-access
+        if isinstance(schema, CompiledSchema):
+            return schema.validate(self.raw(_cache=True))
+        elif schema is not None:
+            return jsonschema.validate(self.raw(_cache=True), schema)
+        elif self._schema is not None:
+            if self._cache.get('validated') is not self._schema:
+                self._schema.validate(self.raw(_cache=True))
+                self._cache_fill('validated', self._schema)
+            return None
+        root = self._root()
+        if root._schema is None:
+            raise ValueError('The current object is not supervised by any schema')
+        keys = self._keys(root)
+        subschema = None if keys is None else root._schema.subschema(keys)
+        if subschema is None:
+            return root.validate()
+        return root._schema.validate(self.raw(_cache=True), subschema)
+
+    def unsubscribe(self, callback):
+        """ Stops sending the change events to callback """
+        if self._subscribers and callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def view(self):
+        """ Returns a read-only Mapping or Sequence over the object, which does not copy it """
+        if isinstance(self._obj, Mapping):
+            return JdicMappingView(self)
+        return JdicSequenceView(self)
 
 
 
@@ -565,15 +1672,69 @@ class JdicMapping(Jdic, Mapping):
     """ A wrapper for Jdics with Mapping root types (usually dict) """
 
 
+class JdicMappingView(Mapping):
+    """ A read-only view over a JdicMapping, its sub-objects are views as well """
+    __slots__ = ['_jdic']
+
+    def __init__(self, jdic):
+        self._jdic = jdic
+
+    def __getitem__(self, key):
+        # pylint: disable=protected-access
+        val = self._jdic._child(key)
+        return val.view() if isinstance(val, Jdic) else val
+
+    def __iter__(self):
+        return iter(self._jdic._obj)
+
+    def __len__(self):
+        return len(self._jdic._obj)
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, self._jdic.json())
+
+class JdicSequenceView(Sequence):
+    """ A read-only view over a JdicSequence, its sub-objects are views as well """
+    __slots__ = ['_jdic']
+
+    def __init__(self, jdic):
+        self._jdic = jdic
+
+    def __getitem__(self, index):
+        # pylint: disable=protected-access
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        val = self._jdic._child(index)
+        return val.view() if isinstance(val, Jdic) else val
+
+    def __len__(self):
+        return len(self._jdic._obj)
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, self._jdic.json())
+
+
 def jdic_create(iterable, **kwargs):
     """ This function returns a Jdic correctly typped according to the data root type """
-    if isinstance(iterable, Mapping):
+    kind = _json_kind(iterable)
+    if kind == _MAPPING:
         return JdicMapping(iterable, **kwargs)
-    elif isinstance(iterable, Sequence):
+    elif kind == _SEQUENCE or isinstance(iterable, Sequence):
         return JdicSequence(iterable, **kwargs)
     else:
         raise ValueError('Cannot create Jdic object from "{}"'.format(type(iterable)))
 
+def jdic_adopt(obj, **kwargs):
+    """
+    Instantiates a Jdic from obj, a dict or a list of plain JSON data already serialized, as
+    json.loads() returns it. obj is adopted without any copy, and lazily wrapped unless lazy
+    is False: the instantiation does not depend on the size of the document. obj then
+    belongs to the Jdic, which wraps its nested dicts and lists in place, so the caller must
+    not use it anymore.
+    """
+    kwargs.setdefault('lazy', True)
+    return jdic_create(obj, _serialized=True, **kwargs)
+
 def jdic_enumerate(obj, sort=False):
     """ Will enumerate dicts and list in a similar fashion, to ease iterables browsing """
     if isinstance(obj, Mapping):
@@ -583,10 +1744,56 @@ def jdic_enumerate(obj, sort=False):
             keys = sorted(dict(obj).keys()) if sort else obj
         for k in keys:
             yield (k, obj[k])
-    elif isinstance(obj, Sequence):
+    elif isinstance(obj, (Sequence, array.array)):
         ind = 0
         for val in obj:
             yield (ind, val)
             ind += 1
     else:
         raise TypeError('Cannot enumerate objects of type "{}"'.format(type(obj)))
+
+def jdic_load(fp, memory_map=False, **kwargs):
+    """
+    Instantiates a Jdic from the JSON document read from the fp file object. With
+    memory_map, the file is mapped in memory and decoded as UTF-8 straight from the map.
+    """
+    if memory_map:
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return jdic_loads(str(mapped, 'utf-8-sig'), **kwargs)
+    return jdic_loads(fp.read(), **kwargs)
+
+def jdic_loads(s, **kwargs):
+    """
+    Instantiates a Jdic from a JSON document (str, bytes or bytearray). Floats are
+    serialized while parsing and the parsed data is adopted as is, unless a custom
+    serializer has to be applied.
+    """
+    trusted = kwargs.get('trusted')
+    if trusted is None:
+        trusted = settings.trusted_input
+    if not trusted and (kwargs.get('serializer') or callable(settings.serialize_custom_function)):
+        return jdic_create(json.loads(s), **kwargs)
+    parse_float = _parse_float_to_int if settings.serialize_float_to_int else None
+    return jdic_create(json.loads(s, parse_float=parse_float), _serialized=True, **kwargs)
+
+def _json_kind(obj):
+    """ Returns the kind of JSON value obj is: _LEAF, _MAPPING, _SEQUENCE or _OTHER """
+    try:
+        return _TYPE_KINDS[type(obj)]
+    except KeyError:
+        pass
+    if any(isinstance(obj, ltype) for ltype in JSON_LEAVES):
+        kind = _LEAF
+    elif isinstance(obj, Mapping):
+        kind = _MAPPING
+    elif isinstance(obj, Sequence):
+        kind = _SEQUENCE
+    else:
+        kind = _OTHER
+    _TYPE_KINDS[type(obj)] = kind
+    return kind
+
+def _parse_float_to_int(literal):
+    """ Parses a JSON float, as an int if it equals its integer form """
+    val = float(literal)
+    return int(val) if val.is_integer() else val
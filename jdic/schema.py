@@ -0,0 +1,115 @@
+"""
+Compiled JSON schemas, able to validate a whole document or only the
+sub-document found at a given path.
+"""
+from __future__ import unicode_literals
+import re
+from collections import Mapping
+import jsonschema
+
+# Keywords whose outcome only depends on the keys, length or type of the object they
+# apply to, or which are resolved by descending into the sub-schemas of its children.
+LOCAL_KEYWORDS = frozenset([
+    '$comment', '$defs', '$id', '$schema', 'additionalItems', 'additionalProperties',
+    'contentEncoding', 'contentMediaType', 'default', 'definitions', 'deprecated',
+    'dependentRequired', 'description', 'examples', 'exclusiveMaximum', 'exclusiveMinimum',
+    'format', 'id', 'items', 'maxItems', 'maxLength', 'maxProperties', 'maximum', 'minItems',
+    'minLength', 'minProperties', 'minimum', 'multipleOf', 'pattern', 'patternProperties',
+    'prefixItems', 'properties', 'propertyNames', 'readOnly', 'required', 'title', 'type',
+    'writeOnly'
+])
+
+ANNOTATION_KEYWORDS = frozenset(['$comment', 'description', 'title'])
+
+
+class CompiledSchema(object):
+    """
+    A JSON schema checked and compiled once, which can be shared by many Jdic objects.
+    Sub-schemas applying at given paths are resolved once and cached.
+    """
+
+    def __init__(self, schema):
+        if isinstance(schema, CompiledSchema):
+            schema = schema.schema
+        validator = jsonschema.validators.validator_for(schema)
+        validator.check_schema(schema)
+        self.schema = schema
+        self.validator = validator(schema)
+        self._children = {}
+
+    @staticmethod
+    def _child(schema, key):
+        """ Returns the sub-schema applying to key within an object validated by schema """
+        # pylint: disable=too-many-return-statements
+        if schema is False:
+            return None
+        if schema is True or not schema:
+            return {}
+        for keyword in schema:
+            if keyword not in LOCAL_KEYWORDS:
+                return None
+        if isinstance(key, int):
+            prefix = schema.get('prefixItems')
+            items = schema.get('items', {})
+            if isinstance(items, list):
+                prefix, items = items, schema.get('additionalItems', {})
+            if prefix is not None and key < len(prefix):
+                return prefix[key]
+            return None if items is False else items
+        schemas = []
+        if key in schema.get('properties', {}):
+            schemas.append(schema['properties'][key])
+        for pattern, subschema in schema.get('patternProperties', {}).items():
+            if re.search(pattern, key):
+                schemas.append(subschema)
+        if not schemas:
+            additional = schema.get('additionalProperties', {})
+            return None if additional is False else additional
+        return schemas[0] if len(schemas) == 1 else {'allOf': schemas}
+
+    def _resolve(self, schema):
+        """ Follows local references, returns None if a reference cannot be followed """
+        while isinstance(schema, Mapping) and '$ref' in schema:
+            ref = schema['$ref']
+            if not ref.startswith('#') or set(schema) - ANNOTATION_KEYWORDS - {'$ref'}:
+                return None
+            schema = self.schema
+            for token in ref[1:].split('/')[1:]:
+                token = token.replace('~1', '/').replace('~0', '~')
+                try:
+                    schema = schema[int(token) if isinstance(schema, list) else token]
+                except (KeyError, IndexError, TypeError, ValueError):
+                    return None
+        return schema
+
+    def subschema(self, keys):
+        """
+        Returns the sub-schema applying to the object found at keys (a list of keys from
+        the root of the document). None is returned when the validity of that object
+        cannot be checked apart from the rest of the document.
+        """
+        schema = self.schema
+        for key in keys:
+            schema = self._resolve(schema)
+            if schema is None:
+                return None
+            if isinstance(key, int) and isinstance(schema, Mapping) and \
+               'prefixItems' not in schema and not isinstance(schema.get('items'), list):
+                key = -1 # All the items share the same sub-schema
+            cache_key = (id(schema), key)
+            if cache_key not in self._children:
+                self._children[cache_key] = self._child(schema, key)
+            schema = self._children[cache_key]
+            if schema is None:
+                return None
+        return schema
+
+    def validate(self, instance, subschema=None):
+        """ Validates instance against the schema, or against one of its sub-schemas """
+        if subschema is None:
+            errors = self.validator.iter_errors(instance)
+        else:
+            errors = self.validator.descend(instance, subschema)
+        error = jsonschema.exceptions.best_match(errors)
+        if error is not None:
+            raise error
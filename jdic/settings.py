@@ -3,10 +3,20 @@
 
 # JSON path parsing settings
 json_path_driver = "mongo"
+json_path_cache_size = 512
+
+# Number of compiled queries kept in cache by the drivers
+query_cache_size = 512
+
+# Construction settings
+lazy_wrapping = False
+compact_numeric_sequences = False
 
 # Serialization settings
 serialize_float_to_int = True
 serialize_custom_function = None
+# Values are known to be plain JSON, custom serializers are not called
+trusted_input = False
 
 # __str()__ json dump behavior
 json_dump_sort_keys = True
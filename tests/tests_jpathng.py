@@ -43,3 +43,38 @@ def test_set_value_at_path():
     assert o['j[*].a'] == [0, 0]
     o['e.*.eb'] = 0
     assert o['e.*.eb'] == [0]
+
+def test_compiled_path():
+    from jdic.drivers.jsonpath_ng import Driver
+    o = new(driver = 'jsonpath_ng')
+    expr = Driver.compile_path('j[*].a')
+    assert expr is Driver.compile_path('j[*].a')
+    assert o[expr] == [1, 2]
+    o[expr] = 3
+    assert o['j[*].a'] == [3, 3]
+    del(o[expr])
+    assert o['j[*].a'] == []
+    assert Driver.path_cache_info()['hits'] > 0
+
+def test_set_del_parent_resolution():
+    o = new(driver = 'jsonpath_ng')
+    o['i[-1]'] = 4
+    o['h.a.b[*][0]'] = 0
+    assert o['i'] == [1, 2, 4]
+    assert o['h.a.b'] == [[[0, 2], [0, 4], [0, 6]]]
+    o['g.a.b.`parent`'] = 1
+    assert o['g.a'] == [1]
+    del(o['h.a.b[*][1]'])
+    assert o['h.a.b'] == [[[0], [0], [0]]]
+    assert o.checksum() == o.new().checksum()
+
+def test_path_index():
+    o = new(driver = 'jsonpath_ng').index_paths()
+    assert o['m.a.[0].b.[0].c'] == [3] and o['j[*].a'] == [1, 2]
+    assert o.path_index_info()['paths'] == 1
+    o['m.a.[0].b.[0].c'] = 4
+    assert o['m.a.[0].b.[0].c'] == [4]
+    o['j.[3]'] = {'a' : 4}
+    assert o['j[*].a'] == [1, 2, 4]
+    del o['m.a.[0].b.[0].c']
+    assert o['m.a.[0].b.[0].c'] == []
@@ -84,6 +84,20 @@ def test_custom_serializer():
     assert o['2'] == "Python Exception"
     settings.serialize_custom_function = None
 
+def test_trusted_input():
+    from collections import OrderedDict, UserList
+    calls = []
+    def myserializer(obj):
+        calls.append(obj)
+        return obj
+    o = jdic({'a' : OrderedDict([('b', UserList([1, 2.0]))])}, serializer = myserializer)
+    assert calls and o['a.b'] == [1, 2] and type(o['a.b']).__name__ == 'JdicSequence'
+    del calls[:]
+    o = jdic({'a' : {'b' : [1, 2.0]}}, serializer = myserializer, trusted = True)
+    o['c'] = {'d' : 1}
+    assert not calls and o['a.b'] == [1, 2] and o.new()['c'] == {'d' : 1}
+    assert jdic([Exception('e')], trusted = True)[0] == 'e'
+
 def test_copy_deepcopy():
     o = new()
     assert o == deepcopy(o)
@@ -97,6 +111,33 @@ def test_copy_deepcopy():
     o['d'] = j
     assert o['d'] == {'da':'dc'}
 
+def test_snapshot():
+    o = new().index_search()
+    checksum = o.checksum()
+    d = o['d']
+    s = o.new()
+    assert s == o and s.checksum() == checksum
+    d['da'] = 'dc'
+    o['h.b.c.2.0.d'] = 'f'
+    assert o['d.da'] == 'dc' and s['d.da'] == 'db'
+    assert s['h.b.c.2.0.d'] == 'e' and s.checksum() == checksum
+    t = copy(s)
+    s['g.a.b'].append(4)
+    del t['e.ea']
+    assert o['g.a.b'] == [1,2,3] and s['g.a.b'] == [1,2,3,4] and t['g.a.b'] == [1,2,3]
+    assert o['e.ea'] == {'eb':'ec'} and s['e.ea'] == {'eb':'ec'} and 'ea' not in t['e']
+    assert s['g.a.b'].parent().parent().parent() is s
+    assert [m.path for m in o.find_match({'d' : 'f'})] == ['h.b.c.2', 'h.b.c.2.0']
+    assert deepcopy(o).raw() == o.raw() and new(asdict = True)['d'] == {'da':'db'}
+    o = jdic({'p':{'c':{'x':1}}, 'q':[1]})
+    o.checksum()
+    o['p']['c']['x'] = 2
+    s = o.new()
+    o['p']['c']['x'] = 3
+    assert s.json() == jdic({'p':{'c':{'x':2}}, 'q':[1]}).json()
+    assert s.checksum() == jdic(s.raw()).checksum()
+    assert o.json() == jdic(o.raw()).json() and o.checksum() == jdic(o.raw()).checksum()
+
 def test_depth_deepness():
     o = jdic({'a':{'b':{'c':{'d':1}}}, 'e':True})
     assert o['a.b.c'].depth() == 3
@@ -135,6 +176,59 @@ def test_diff_patch():
     p = None
     assert o.patch(o.diff(p)) == None
 
+def test_diff_arr_mode():
+    o = jdic({'a' : [1, 2, 3, 4], 'b' : {'c' : [{'d' : 1}, {'e' : 2}]}})
+    p = jdic({'a' : [1, 3, 4, 5], 'b' : {'c' : [{'d' : 1}, {'e' : 3}]}})
+    assert o.diff(p) == [[['b', 'c', 1, 'e'], 3], [['a', 1]], [['a', 3], 5]]
+    assert o.diff(p, arr_mode = 'index') == \
+           [[['b', 'c', 1, 'e'], 3], [['a', 1], 3], [['a', 2], 4], [['a', 3], 5]]
+    assert o.patch(o.diff(p)) == p and o.patch(o.diff(p, arr_mode = 'index')) == p
+    assert o.diff({'a' : [0, 1, 2, 3, 4]}) == [[['a', 0], 0, 'i'], [['b']]]
+    assert o.diff(o.new()) == [] and o.diff(deepcopy(o.raw())) == []
+
+def test_patch_inplace():
+    schema = {'type' : 'object', 'properties' : {'a' : {'type' : 'array'}}}
+    o = jdic({'a' : [1, 2, 3], 'b' : {'c' : 1}, 'e' : {'f' : 1}}, schema = schema)
+    p = jdic({'a' : [0, 1, 3], 'b' : {'c' : 2, 'd' : [4]}, 'e' : {'f' : 1}})
+    e = o['e']
+    e.checksum()
+    assert o.patch(o.diff(p), inplace = True) is o and o == p
+    assert o['e'] is e and 'checksum' in e._cache
+    with o.batch():
+        o.patch([[['a'], 'x']], inplace = True)
+        o.patch([[['a'], [5]], [['b']]], inplace = True)
+    assert o == {'a' : [5], 'e' : {'f' : 1}}
+    exception = False
+    try:
+        o.patch([[['a', 1], 6], [['a'], 'x']], inplace = True)
+    except Exception:
+        exception = True
+    assert exception and o == {'a' : [5], 'e' : {'f' : 1}}
+
+def test_change_feed():
+    from jdic import ChangeLog
+    o = new()
+    p = o.new()
+    log = o.subscribe(ChangeLog())
+    o.merge({'f' : {'fa' : {'fab' : 3}}})
+    events = o['d'].subscribe(ChangeLog())
+    o['d.da'] = 'dc'
+    o['d.da'] = 'dd'
+    o['d'].update({'db' : {'x' : 1}})
+    del o['h.b.c.0']
+    o['i'].append(4)
+    o['i'].insert(0, 0)
+    o['j'].pop()
+    o.patch([[['j', 0, 'a'], 5]], inplace = True)
+    assert [(e.path, e.op, e.old, e.new) for e in events.events] == [
+        (['da'], 'set', 'db', 'dc'), (['da'], 'set', 'dc', 'dd'), (['db'], 'add', None, {'x' : 1})]
+    assert log.events[1:3] == [(['d', 'da'], 'set', 'db', 'dc'), (['d', 'da'], 'set', 'dc', 'dd')]
+    assert (['i', 0], 'insert', None, 0) in log.events and len(log.patch()) == len(log) - 1
+    assert p.patch(log.patch(), inplace = True) == o
+    o.unsubscribe(log)
+    o['d.da'] = 'de'
+    assert len(log) == 9 and len(events) == 4
+
 def test_enumerate():
     from jdic import enumerate
     a = [1,2,3]
@@ -212,6 +306,24 @@ def test_attr_proxy():
     o['d'].update({ 'da' : 'dc' })
     assert o['d'] == { 'da' : 'dc' }
 
+def test_attr_proxy_tracking():
+    o = new().index_search()
+    checksum = o.checksum()
+    assert o['d'].copy() == {'da' : 'db'} and o['i'].count(2) == 1
+    assert 'checksum' in o._cache and 'checksum' in o['d']._cache
+    o['m'].pop('a')
+    o['i'].append({'ia' : 7})
+    assert 'checksum' in o['d']._cache and o.checksum() != checksum
+    assert o.checksum() == o.new().checksum() and [m.path for m in o.find(7)] == ['i.3.ia']
+    p = jdic({'a' : {'b' : {'c' : [1]}}})
+    p.checksum()
+    for i in range(3):
+        p['a.b.c'].append(i)
+        assert p.json() == jdic(p.raw()).json()
+    p['a.b.c'].extend([3, 4])
+    p['a.b'].update({'d' : 1})
+    assert p.checksum() == jdic({'a' : {'b' : {'c' : [1, 0, 1, 2, 3, 4], 'd' : 1}}}).checksum()
+
 def test_nb_leaves():
     o = jdic({
         'a':1,
@@ -268,6 +380,31 @@ def test_merge():
     o.merge({'a':[1,2]})
     assert o == {'a':[1,2], 'b':3}
 
+def test_merge_inplace():
+    schema = {'type' : 'object', 'properties' : {'a' : {'type' : 'null'}}}
+    o = new(schema = schema)
+    e, m = o['e'], o['m.a.0']
+    e.checksum()
+    o.merge([{'a' : 3, 'm' : {'a' : [{'b' : 1}]}}, {'a' : None, 'e' : {'ea' : {'eb' : 'ec'}}}],
+            arr_mode = 'merge')
+    assert o['e'] is e and 'checksum' in e._cache and o['m.a.0'] is m and m == {'b' : 1}
+    assert o.checksum() == jdic(o.raw()).checksum()
+    o.merge({'g' : {'a' : {'b' : [3, 4]}}, 1 : 'x'}, arr_mode = 'new')
+    assert o['g.a.b'] == [1, 2, 3, 4] and o['1'] == 'x'
+    exception = False
+    try:
+        o.merge([{'b' : 1}, {'a' : 3}])
+    except Exception:
+        exception = True
+    assert exception and o['b'] == 1
+
+def test_merge_new():
+    o = jdic({'a' : [1, 'x', {'b' : 1}, [2], {'b' : 1}]})
+    o.merge({'a' : [True, 'y', {'b' : 1}, {'b' : 1.5}, [2], [3], 'y', None, [3]]}, arr_mode = 'new')
+    assert o['a'] == [1, 'x', {'b' : 1}, [2], {'b' : 1}, 'y', {'b' : 1.5}, [3], None]
+    o.merge(jdic({'a' : [{'b' : 1.5}, {'c' : 1}]}), arr_mode = 'new')
+    assert o['a.9'] == {'c' : 1} and len(o['a']) == 10
+
 def test_match():
     o = jdic({'e':[{'f':'4'}]})
     assert o.match({'e.f': { '$exists': True }}) == True
@@ -318,3 +455,345 @@ def test_dict_unmatch():
     o, p = new(), new(asdict = True)
     o['a'] = 0
     assert o != p
+
+def test_lazy():
+    from jdic import adopt
+    p = new()
+    o = jdic(new(asdict = True), lazy = True)
+    assert type(o._obj['m']).__name__ == 'dict'
+    assert o['m.a.0.b.0.c'] == 3
+    assert type(o._obj['m']).__name__ == 'JdicMapping'
+    assert type(o._obj['h']).__name__ == 'dict'
+    assert o['m.a.0.b'].parent(3) == o['m']
+    o['h.a.b.0'] = 0
+    assert o['h.a.b'] == [0, [3,4], [5,6]]
+    o['h.a.b.0'] = [1,2]
+    assert [r.path for r in o.leaves(sort = True)] == [r.path for r in p.leaves(sort = True)]
+    assert o == p
+    o.merge({'d' : {'dz' : 1}})
+    assert o['d'] == {'da' : 'db', 'dz' : 1}
+    d = {'a' : {'b' : {'c' : 1}}, 'l' : [[1]]}
+    o = jdic(d, lazy = True)
+    d['a']['b']['c'] = 2
+    d['l'][0].append(2)
+    assert o['a.b.c'] == 1 and o['l'] == [[1]]
+    assert o.checksum() == jdic({'a' : {'b' : {'c' : 1}}, 'l' : [[1]]}).checksum()
+    o['l'].append({'x' : [1]})
+    assert type(d['a']['b']) is dict and d['l'] == [[1, 2]]
+    # Adopted documents are not copied, only the levels accessed are
+    d = {'a' : {'b' : {'c' : 1}}, 'l' : [[1]], 'n' : {str(i) : [i] for i in range(1000)}}
+    o = adopt(d)
+    n = d['n']
+    assert o._obj is d and o['a.b.c'] == 1
+    assert d['n'] is n and all(type(v) is list for v in n.values())
+    o['l.0'].append(2)
+    assert o['l'] == [[1, 2]] and type(d['l']).__name__ == 'JdicSequence'
+    assert o.checksum() == jdic(o.raw()).checksum()
+
+def test_compact_sequences():
+    from array import array
+    from jdic import loads
+    settings.compact_numeric_sequences = True
+    try:
+        o = jdic({'i' : [1, 2, 3], 'f' : [0.5, 1.5], 'm' : [1, 0.5], 'b' : [True, 1]})
+        p = loads(o.json())
+    finally:
+        settings.compact_numeric_sequences = False
+    q = jdic({'i' : [1, 2, 3], 'f' : [0.5, 1.5], 'm' : [1, 0.5], 'b' : [True, 1]})
+    assert [type(o[k]._obj) for k in 'ifmb'] == [array, array, list, list]
+    assert type(p['f']._obj) == array
+    assert o.checksum() == q.checksum() and o.json() == q.json() and o.raw() == q.raw()
+    assert o == p and o['i'] == [1, 2, 3] and o['i'] != [1, 2, 3.5]
+    assert [m.path for m in o.find_match({'$size' : 3})] == ['i']
+    o['i.0'] = 4
+    assert type(o['i']._obj) == array
+    o['i.1'] = 'a'
+    o['f'].append(2)
+    assert type(o['i']._obj) == list and type(o['f']._obj) == list
+    q['i.0'] = 4
+    q['i.1'] = 'a'
+    q['f'].append(2)
+    assert o.checksum() == q.checksum()
+    # Ints out of the range of the arrays
+    big = 2**70
+    settings.compact_numeric_sequences = True
+    try:
+        o = jdic({'i' : [1, 2], 'a' : [1, 2], 'm' : [1, 2], 'p' : [1, 2]})
+        o['i.0'] = big
+        o.merge({'a' : [big]}, arr_mode = 'append')
+        o.merge({'m' : [big]}, arr_mode = 'merge')
+        o = o.patch([[['p', 0], big], [['p', 1], big, 'i']])
+    finally:
+        settings.compact_numeric_sequences = False
+    assert o.raw() == {'i' : [big, 2], 'a' : [1, 2, big], 'm' : [big, 2], 'p' : [big, big, 2]}
+    assert o.checksum() == jdic(o.raw()).checksum()
+
+def test_deep_browse():
+    import sys
+    doc = obj = {}
+    for _ in range(sys.getrecursionlimit() * 2):
+        obj['a'] = [{}]
+        obj = obj['a'][0]
+    obj['b'] = 1
+    o = jdic(doc, lazy = True)
+    assert o.nb_leaves() == 1
+    assert [m.depth for m in o.find(1)] == [o.deepness()]
+    assert len(list(o.browse(maxdepth = 10))) == 12
+    assert o.checksum() != jdic(doc, lazy = True).merge({'a' : []}).checksum()
+
+def test_checksum_incremental():
+    o = new()
+    o.checksum()
+    o['h.b.c.2.0.d'] = 'f'
+    assert o.checksum() == o.new().checksum()
+    o['d.dz'] = 1
+    assert o.checksum() == o.new().checksum()
+    del(o['d.da'])
+    del(o['h.a.b.0'])
+    assert o.checksum() == o.new().checksum()
+    o['j.1'] = {'a':3}
+    o['j.1.b'] = 3
+    assert o.checksum() == o.new().checksum()
+    o['i'].append(4)
+    assert o.checksum() == o.new().checksum()
+    assert o.checksum() != new().checksum()
+
+def test_batch():
+    schema = {
+        "type" : "object",
+        "properties" : {
+            "a" : { "type" : "null" }
+        }
+    }
+    o = new(schema = schema)
+    with o.batch():
+        o['a'] = 3
+        o['m.a.0.b'] = 4
+        o['a'] = None
+    assert o['m.a.0.b'] == 4
+    exception = False
+    try:
+        with o['m'].batch():
+            o['m.a.0.b'] = 5
+            o['a'] = 3
+    except:
+        exception = True
+    assert exception
+    assert o['a'] == None and o['m.a.0.b'] == 4
+    exception = False
+    try:
+        with o.batch(rollback = False):
+            o['a'] = 3
+    except:
+        exception = True
+    assert exception and o['a'] == 3
+
+def test_subtree_validation():
+    from jdic import CompiledSchema
+    schema = CompiledSchema({
+        "definitions" : { "int" : { "type" : "integer" } },
+        "type" : "object",
+        "properties" : {
+            "a" : { "type" : "array", "items" : { "$ref" : "#/definitions/int" } },
+            "b" : { "anyOf" : [ { "type" : "object", "properties" : { "c" : { "type" : "string" } } } ] }
+        }
+    })
+    assert schema.subschema(['a', 3]) == { "$ref" : "#/definitions/int" }
+    assert schema.subschema(['b']) is not None
+    assert schema.subschema(['b', 'c']) is None
+    o, p = jdic({'a' : [1, 2], 'b' : {'c' : 'd'}}, schema = schema), jdic({'a' : []}, schema = schema)
+    o['a'].validate()
+    o['a.1'] = 3
+    exception = False
+    try:
+        o['a.1'] = 'x'
+    except:
+        exception = True
+    assert exception
+    exception = False
+    try:
+        o['b.c'] = 1
+    except:
+        exception = True
+    assert exception
+    o['a.1'] = 3
+    o['b.c'] = 'e'
+    assert o._schema is p._schema is o.new()._schema
+
+def test_find_match():
+    from jdic.drivers.mongo import Driver, CompiledQuery
+    o = new()
+    assert [m.path for m in o.find_match({'a' : 1})] == ['j', 'j.0', 'k.0', 'k.0.0', 'l.0.0', 'l.0.0.0']
+    assert [m.path for m in o.find_match({'a' : 1}, limit = 1)] == ['j']
+    query = CompiledQuery({'da' : {'$regex' : '/^D/i'}})
+    assert [m.path for m in o.find_match(query)] == ['d']
+    assert o['d'].match(query)
+    info = Driver.query_cache_info()
+    o.match({'b' : 0.1, 'a' : None})
+    o.match({'a' : None, 'b' : 0.1})
+    assert Driver.query_cache_info()['hits'] == info['hits'] + 1
+    assert Driver.compile_query({'a' : 1}) is Driver.compile_query({'a' : 1})
+
+def test_view_raw_cache():
+    from collections.abc import Mapping, Sequence
+    o = new()
+    v = o.view()
+    assert isinstance(v, Mapping) and isinstance(v['m']['a'], Sequence)
+    assert v['m']['a'][0]['b'][0]['c'] == 3
+    assert dict(v['d']) == {'da' : 'db'}
+    assert [e['a'] for e in v['j'][:2]] == [1, 2]
+    snapshot = o.raw(_cache = True)
+    assert snapshot is o.raw(_cache = True) and snapshot is not o.raw()
+    o['d.da'] = 'dc'
+    assert v['d']['da'] == 'dc'
+    assert o.raw(_cache = True)['d'] == {'da' : 'dc'} and snapshot['d'] == {'da' : 'db'}
+    assert o.raw(_cache = True)['m'] is snapshot['m']
+    j = o.json()
+    assert j is o.json()
+    o['d.da'] = 'db'
+    assert j != o.json() and o.json() == new().json()
+
+def test_dump():
+    import io
+    o = new()
+    o['m.a.0.b.1'] = {'x' : [], 'y' : {}, 'z' : 'é"\n'}
+    for sort_keys in [False, True]:
+        for indent in [None, 0, 2, '\t']:
+            for ensure_ascii in [False, True]:
+                kwargs = {'sort_keys' : sort_keys, 'indent' : indent, 'ensure_ascii' : ensure_ascii}
+                j = o.json(**kwargs)
+                o._flag_modified()
+                assert ''.join(o.iter_json(chunk_size = 10, **kwargs)) == j
+                fp = io.StringIO()
+                o.dump(fp, **kwargs)
+                assert fp.getvalue() == j
+    assert jdic([]).json() == ''.join(jdic([]).iter_json())
+    j = o.json()
+    chunks = list(o.iter_json(chunk_size = 10))
+    assert ''.join(chunks) == j and max(map(len, chunks)) == 10 and len(chunks) > 1
+
+def test_load():
+    import io, json, tempfile
+    from jdic import load, loads
+    o = new()
+    s = o.json()
+    assert loads(s) == o and loads(s.encode('utf-8')) == o
+    assert loads(s).checksum() == o.checksum() and loads(s).json() == s
+    assert loads('{"a" : [1.0, 1.5, {"b" : 2.0}]}').raw() == {'a' : [1, 1.5, {'b' : 2}]}
+    assert loads('[[1]]', lazy = True)[0].raw() == [1]
+    assert loads('{"a" : 1}', serializer = lambda x: x).raw() == {'a' : 1}
+    assert load(io.StringIO(s)) == o
+    with tempfile.TemporaryFile() as fp:
+        fp.write(s.encode('utf-8'))
+        fp.seek(0)
+        assert load(fp, memory_map = True) == o
+    j = loads(s, schema = {'type' : 'object'})
+    exception = False
+    try:
+        loads(s, schema = {'type' : 'array'})
+    except:
+        exception = True
+    assert exception
+    j['d.da'] = 'dc'
+    assert j['d'] == {'da' : 'dc'} and j['d'].parent() is j and j['d'].path() == 'd'
+
+def test_path_index():
+    o = new().index_paths()
+    assert o.path_index_info()['paths'] == 0
+    assert o['m.a.0.b.0.c'] == 3 and o['m.a.0.b.0.c'] == 3
+    assert o['h.b.c.1.0'] == -1
+    assert o.path_index_info()['paths'] == 2
+    o['m.a.0.b.0.c'] = 4
+    assert o['m.a.0.b.0.c'] == 4
+    o['m.a.0'] = {'b' : [{'c' : 5}]}
+    assert o['m.a.0.b.0.c'] == 5
+    del o['h.b.c.0']
+    assert o['h.b.c.1.0'] == {'d' : 'e'}
+    o['i'].append(4)
+    assert o['i.3'] == 4
+    o.merge({'m' : {'a' : [{'b' : [{'c' : 6}]}]}})
+    assert o['m.a.0.b.0.c'] == 6
+    del o['m.a']
+    exception = False
+    try:
+        o['m.a.0.b.0.c']
+    except KeyError:
+        exception = True
+    assert exception
+    assert o['m'] == {} and o['i'] == [1, 2, 3, 4] and o['h.b.c'] == [[-1, 1], [{'d' : 'e'}]]
+    assert o.index_paths(False).path_index_info() is None
+
+def test_search_index():
+    o = new().index_search()
+    p = new()
+    def same(search):
+        return [(m.path, m.key, m.depth) for m in search(o)] == \
+               [(m.path, m.key, m.depth) for m in search(p)]
+    assert o.search_index_info()['entries'] > 0
+    for j in [o, p]:
+        j['m.a.0.b.1'] = {'c' : 3, 'x' : 1}
+        del j['h.b.c.0']
+        j['k.1'] = [{'c' : 3}, {'fab' : 2}]
+        j.merge({'d' : {'c' : 3}})
+    assert same(lambda j: j.find(3))
+    assert same(lambda j: j.find(1, sort = True))
+    assert same(lambda j: j.find(3, depth = 4))
+    assert same(lambda j: j.find(2, maxdepth = 2))
+    assert same(lambda j: j.find(3, limit = 1))
+    assert same(lambda j: j.find({'c' : 3}))
+    assert same(lambda j: j.find_keys('c'))
+    assert same(lambda j: j.find_keys(['c', 'x'], mode = 'all', sort = True))
+    assert same(lambda j: j.find_keys(['fab', 'da'], depth = 1))
+    assert same(lambda j: j.find_keys('c', maxdepth = 1, limit = 2))
+    assert o.index_search(False).search_index_info() is None
+
+def test_find_match_plan():
+    from jdic.drivers.mongo import Driver
+    plan = Driver.plan_query(Driver.compile_query({'a' : {'$gt' : 0}, 'b.c' : {'$exists' : True}}))
+    assert plan.required_keys == {'a', 'b'} and not plan.strings and not plan.sequences
+    plan = Driver.plan_query(Driver.compile_query({'b' : {'$exists' : True}, 'a' : {'$size' : 1}}))
+    assert plan.required_keys == {'a', 'b'} and not plan.strings and plan.sequences
+    query = Driver.compile_query({'$or' : [{'a' : 1}, {'b' : {'$ne' : 1}}]})
+    assert Driver.plan_query(query) is None
+    o = new()
+    p = new().index_search()
+    p['k.1'] = [{'c' : 3}, {'a' : [1]}]
+    o['k.1'] = [{'c' : 3}, {'a' : [1]}]
+    for query in [{'a' : 1}, {'c' : {'$in' : [3, 5.0]}}, {'b' : {'$exists' : True}},
+                  {'$and' : [{'a' : {'$gte' : 1}}, {'a' : {'$lt' : 2}}]}, {'a' : {'$ne' : 1}},
+                  {'$or' : [{'a' : 2}, {'c' : 3}]}, {'b.c' : {'$size' : 3}}]:
+        naive = [m.path for m in o.browse() if Driver.match(m.value, query)]
+        assert [m.path for m in o.find_match(query)] == naive
+        assert [m.path for m in p.find_match(query)] == naive
+        assert [m.path for m in p.find_match(query, sort = True, maxdepth = 2)] == \
+               [m.path for m in o.find_match(query, sort = True, maxdepth = 2)]
+
+def test_batch_map():
+    from jdic import batch
+    schema = {'type' : 'object', 'properties' : {'id' : {'type' : 'integer'}}}
+    docs = [{'id' : i, 'a' : [{'b' : i % 3}]} for i in range(25)]
+    docs[7]['id'] = 'x'
+    ops = ['checksum', ('validate', schema), ('find_match', {'b' : 1})]
+    expected = [[jdic(doc).checksum(), None,
+                 [[m.path, m.value.raw()] for m in jdic(doc).find_match({'b' : 1})]] for doc in docs]
+    assert expected[1][2] == [['a', [{'b' : 1}]], ['a.0', {'b' : 1}]]
+    expected[7][1] = "'x' is not of type 'integer'"
+    docs[3] = jdic(docs[3])
+    docs[4] = jdic(docs[4]).json()
+    assert batch.map(docs, ops, workers = 2, chunksize = 3) == expected
+    assert list(batch.imap(iter(docs), ops, workers = 0, chunksize = 10)) == expected
+    checksums, matches = batch.imap(docs, ['checksum'], workers = 0, chunksize = 1), \
+                         batch.imap(docs, [('find_match', {'b' : 1})], workers = 0, chunksize = 1)
+    assert [[next(checksums), next(matches)] for _ in range(3)] == \
+           [[[checksum], [found]] for checksum, _, found in expected[:3]]
+    checksums.close()
+    matches.close()
+    results = batch.imap(docs, ['checksum'], workers = 1, chunksize = 1)
+    assert next(results) == expected[0][:1]
+    results.close()
+    exception = False
+    try:
+        batch.map(docs, ['raw'], workers = 0)
+    except ValueError:
+        exception = True
+    assert exception